@@ -1,15 +1,21 @@
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import uuid4
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.engine.row import Row
 from sqlalchemy.inspection import inspect
 import os, ssl
-from sqlalchemy import select, text, and_
-from sqlalchemy.orm import declarative_base
+import asyncpg
+import orjson
+from fastapi import Depends, HTTPException, Header as FastAPIHeader
+from cachetools import TTLCache
+from sqlalchemy import bindparam, func, select, text, and_, event, exists
+from sqlalchemy.orm import Session, declarative_base, raiseload
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 
-from models import Header, Node, User, VerifyLogin, Workspace
+from models import Environment, Header, Node, NodeClosure, User, VerifyLogin, Workspace
 
 
 PROD_HOST = os.environ.get('PRODUCTION_POSTGRES_HOST')
@@ -23,6 +29,43 @@ base_dir = Path.cwd()
 JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'your-secret-key-here')
 JWT_ALGORITHM = os.environ.get('JWT_ALGORITHM', 'HS256')
 
+# Connection pool sizing (SQLAlchemy engine + raw asyncpg pool)
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '20'))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', '40'))
+DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', '3600'))
+DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', '30'))
+DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+PG_POOL_MIN_SIZE = int(os.environ.get('PG_POOL_MIN_SIZE', '5'))
+PG_POOL_MAX_SIZE = int(os.environ.get('PG_POOL_MAX_SIZE', '20'))
+
+# Set when PRODUCTION_POSTGRES_HOST/PORT point at PgBouncer in transaction pooling mode
+# (typically port 6432): PgBouncer owns the server connections, so the engine opens one per
+# checkout (NullPool) and names its prepared statements uniquely so they never collide on a
+# shared backend. The raw asyncpg pool's named statements need PgBouncer >= 1.21 with
+# max_prepared_statements enabled.
+DB_PGBOUNCER = os.environ.get('DB_PGBOUNCER', 'false').lower() in ('1', 'true', 'yes')
+DB_PREPARED_STATEMENT_CACHE_SIZE = int(os.environ.get('DB_PREPARED_STATEMENT_CACHE_SIZE', '500'))
+
+# Dev/test only: make every un-eager-loaded relationship access raise instead of lazy loading
+DB_RAISELOAD = os.environ.get('DB_RAISELOAD', 'false').lower() in ('1', 'true', 'yes')
+
+# In-process cache of environment lookups used by the read-only variable endpoints
+ENV_CACHE_MAXSIZE = int(os.environ.get('ENV_CACHE_MAXSIZE', '1024'))
+ENV_CACHE_TTL = float(os.environ.get('ENV_CACHE_TTL', '5'))
+
+# In-process cache of username -> user id and of positive workspace ownership checks
+USER_CACHE_MAXSIZE = int(os.environ.get('USER_CACHE_MAXSIZE', '10000'))
+USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL', '60'))
+OWNERSHIP_CACHE_TTL = float(os.environ.get('OWNERSHIP_CACHE_TTL', '5'))
+
+# In-process cache of folder ancestor paths + headers used for header inheritance
+HEADERS_CACHE_MAXSIZE = int(os.environ.get('HEADERS_CACHE_MAXSIZE', '10000'))
+HEADERS_CACHE_TTL = float(os.environ.get('HEADERS_CACHE_TTL', '60'))
+
+# In-process cache of the full workspace tree returned by the node mutation endpoints
+WORKSPACE_TREE_CACHE_MAXSIZE = int(os.environ.get('WORKSPACE_TREE_CACHE_MAXSIZE', '256'))
+WORKSPACE_TREE_CACHE_TTL = float(os.environ.get('WORKSPACE_TREE_CACHE_TTL', '60'))
+
 # Check if all required environment variables are set
 if not all([PROD_HOST, PROD_USER, PROD_PASSWORD, PROD_DB]):
     raise RuntimeError(
@@ -32,25 +75,53 @@ if not all([PROD_HOST, PROD_USER, PROD_PASSWORD, PROD_DB]):
     )
 
 
+def json_dumps(value: Any) -> str:
+    """orjson-backed serializer for JSON columns (SQLAlchemy engine and asyncpg pool)"""
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
 try:
     # Create SSL context with relaxed verification for development
     ssl_context = ssl.create_default_context()
     ssl_context.check_hostname = False
     ssl_context.verify_mode = ssl.CERT_NONE
 
+    connect_args = {
+        "ssl": ssl_context,
+        "server_settings": {
+            "application_name": "api_testing"
+        },
+        "prepared_statement_cache_size": DB_PREPARED_STATEMENT_CACHE_SIZE
+    }
+    if DB_PGBOUNCER:
+        # asyncpg's own statement cache is per server connection, which PgBouncer swaps under us
+        connect_args["statement_cache_size"] = 0
+        connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid4()}__"
+        pool_args = {"poolclass": NullPool}
+    else:
+        pool_args = {
+            "poolclass": AsyncAdaptedQueuePool,
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "pool_recycle": DB_POOL_RECYCLE,
+            "pool_timeout": DB_POOL_TIMEOUT,
+            "pool_pre_ping": DB_POOL_PRE_PING
+        }
+
     engine = create_async_engine(
         f"postgresql+asyncpg://{PROD_USER}:{PROD_PASSWORD}@{PROD_HOST}:{PROD_PORT}/{PROD_DB}",
         echo=False,
-        connect_args={
-            "ssl": ssl_context,
-            "server_settings": {
-                "application_name": "api_testing"
-            }
-        }
+        json_serializer=json_dumps,
+        json_deserializer=orjson.loads,
+        connect_args=connect_args,
+        **pool_args
     )
+    # Handlers write then commit, and flush explicitly where they need generated ids,
+    # so autoflush before every query is pure overhead
     SessionLocal = async_sessionmaker(
         bind=engine,
         expire_on_commit=False,
+        autoflush=False,
         class_=AsyncSession
     )
     Base = declarative_base()
@@ -58,9 +129,114 @@ except Exception as e:
     raise RuntimeError(f"Failed to connect to PostgreSQL: {e}")
 
 
+if DB_RAISELOAD:
+    @event.listens_for(Session, "do_orm_execute")
+    def _raiseload_unloaded_relationships(orm_execute_state):
+        # Explicit selectinload/joinedload options still win over the wildcard
+        if (
+            orm_execute_state.is_select
+            and not orm_execute_state.is_column_load
+            and not orm_execute_state.is_relationship_load
+        ):
+            orm_execute_state.statement = orm_execute_state.statement.options(raiseload("*"))
+
+
+# Raw asyncpg pool for read-heavy endpoints that only need flat rows (no ORM)
+pg_pool: Optional[asyncpg.Pool] = None
+
+# Postgres equivalent of Python's str(datetime) for TIMESTAMP columns: like str(), it leaves
+# out the fraction when the microseconds are 0, so the ORM handlers' str() values match
+PG_TIMESTAMP_TEXT = (
+    "CASE WHEN extract(microseconds FROM {column})::bigint % 1000000 = 0 "
+    "THEN to_char({column}, 'YYYY-MM-DD HH24:MI:SS') "
+    "ELSE to_char({column}, 'YYYY-MM-DD HH24:MI:SS.US') END"
+)
+
+# Statements prepared once per pooled connection (see _init_pg_connection)
+PREPARED_QUERIES = {
+    "get_user_id_by_email": "SELECT id FROM users WHERE email = $1",
+    "get_ws_by_owner": "SELECT id FROM workspaces WHERE id = $1 AND user_id = $2",
+    # Timestamps come back pre-formatted (same text as str(datetime)) so handlers skip str() per row
+    "get_env_by_ws": (
+        "SELECT id, name, description, is_active, variables, workspace_id, "
+        f"{PG_TIMESTAMP_TEXT.format(column='created_at')} AS created_at, "
+        f"{PG_TIMESTAMP_TEXT.format(column='updated_at')} AS updated_at "
+        "FROM environments WHERE id = $1 AND workspace_id = $2"
+    ),
+    "get_env_variables_by_ws": (
+        "SELECT id, name, variables, created_at, updated_at "
+        "FROM environments WHERE id = $1 AND workspace_id = $2"
+    ),
+    "get_env_version_by_ws": (
+        "SELECT id, updated_at FROM environments WHERE id = $1 AND workspace_id = $2"
+    ),
+    "list_envs_by_ws": (
+        "SELECT id, name, description, is_active, workspace_id, "
+        f"{PG_TIMESTAMP_TEXT.format(column='created_at')} AS created_at, "
+        f"{PG_TIMESTAMP_TEXT.format(column='updated_at')} AS updated_at "
+        "FROM environments WHERE workspace_id = $1 ORDER BY environments.created_at DESC"
+    ),
+}
+
+
+class PreparedConnection(asyncpg.Connection):
+    """asyncpg connection that keeps its prepared statements in `prepared`"""
+    prepared: Dict[str, asyncpg.prepared_stmt.PreparedStatement]
+
+
+async def init_pg_pool():
+    global pg_pool
+    if pg_pool is None:
+        pg_pool = await asyncpg.create_pool(
+            host=PROD_HOST,
+            port=int(PROD_PORT),
+            user=PROD_USER,
+            password=PROD_PASSWORD,
+            database=PROD_DB,
+            ssl=ssl_context,
+            server_settings={"application_name": "api_testing"},
+            min_size=PG_POOL_MIN_SIZE,
+            max_size=PG_POOL_MAX_SIZE,
+            # Behind PgBouncer only the explicitly prepared hot queries are kept
+            statement_cache_size=0 if DB_PGBOUNCER else 100,
+            connection_class=PreparedConnection,
+            init=_init_pg_connection
+        )
+
+
+async def close_pg_pool():
+    global pg_pool
+    if pg_pool is not None:
+        await pg_pool.close()
+        pg_pool = None
+
+
+async def _init_pg_connection(conn: PreparedConnection):
+    # Decode JSON columns (variables, headers content) into Python objects like the ORM does
+    await conn.set_type_codec('json', encoder=json_dumps, decoder=orjson.loads, schema='pg_catalog')
+    # Parse/plan the hot auth+fetch queries once; pool resets don't deallocate them
+    conn.prepared = {name: await conn.prepare(query) for name, query in PREPARED_QUERIES.items()}
+
+
 async def get_db():
     async with SessionLocal() as session:
-        yield session
+        try:
+            yield session
+        except Exception:
+            # Endpoints no longer roll back themselves; the app-level handlers build the response
+            await session.rollback()
+            raise
+
+
+async def get_pg_conn():
+    async with pg_pool.acquire() as conn:
+        yield conn
+
+
+async def fetch_prepared(name: str, *args):
+    """Run a prepared statement on its own pooled connection (safe to gather alongside the ORM session)"""
+    async with pg_pool.acquire() as conn:
+        return await conn.prepared[name].fetchrow(*args)
 
 # Database Health Check
 async def check_db_connection():
@@ -169,23 +345,166 @@ async def log_success_attempt(db: AsyncSession, user_name: str):
 
 # Helper function to get user by username
 async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
-    """Get user by username from header"""
-    result = await db.execute(select(User).where(User.email == username))
-    return result.scalar_one_or_none()
+    """Get user by username from header (memoized on the request's session)"""
+    users = db.info.setdefault("users_by_username", {})
+    if username not in users:
+        result = await db.execute(select(User).where(User.email == username))
+        users[username] = result.scalar_one_or_none()
+    return users[username]
+
+
+# username -> user id; only found users are cached
+user_id_cache: TTLCache = TTLCache(maxsize=USER_CACHE_MAXSIZE, ttl=USER_CACHE_TTL)
+
+
+async def get_user_id_by_username(db: AsyncSession, username: str) -> Optional[int]:
+    """Get the user id for the username header, cached in-process for handlers that only need the id"""
+    user_id = user_id_cache.get(username)
+    if user_id is None:
+        user = db.info.get("users_by_username", {}).get(username)
+        if user is not None:
+            user_id = user.id
+        else:
+            result = await db.execute(select(User.id).where(User.email == username))
+            user_id = result.scalar_one_or_none()
+        if user_id is not None:
+            user_id_cache[username] = user_id
+    return user_id
+
+
+def invalidate_user_cache(username: str):
+    """Drop the cached user id for a username; call after committing a change to the user"""
+    user_id_cache.pop(username, None)
+
+
+# (workspace_id, user_id) -> True; only successful ownership checks are cached, briefly
+workspace_ownership_cache: TTLCache = TTLCache(maxsize=USER_CACHE_MAXSIZE, ttl=OWNERSHIP_CACHE_TTL)
 
 
 # Helper function to verify workspace ownership
 async def verify_workspace_ownership(db: AsyncSession, workspace_id: int, user_id: int) -> bool:
-    """Verify that the workspace belongs to the user"""
-    result = await db.execute(
-        select(Workspace).where(
-            and_(
-                Workspace.id == workspace_id,
-                Workspace.user_id == user_id
+    """Verify that the workspace belongs to the user (memoized on the request's session and in-process)"""
+    if (workspace_id, user_id) in workspace_ownership_cache:
+        return True
+    owned = db.info.setdefault("workspace_ownership", {})
+    if (workspace_id, user_id) not in owned:
+        result = await db.execute(
+            select(Workspace.id).where(
+                and_(
+                    Workspace.id == workspace_id,
+                    Workspace.user_id == user_id
+                )
             )
         )
+        owned[(workspace_id, user_id)] = result.scalar_one_or_none() is not None
+    if owned[(workspace_id, user_id)]:
+        workspace_ownership_cache[(workspace_id, user_id)] = True
+    return owned[(workspace_id, user_id)]
+
+
+def invalidate_workspace_ownership(workspace_id: int):
+    """Drop cached ownership checks for a workspace; call after deleting it"""
+    for key in [key for key in list(workspace_ownership_cache.keys()) if key[0] == workspace_id]:
+        workspace_ownership_cache.pop(key, None)
+
+
+# Helper function to load user, owned workspace and environment in one round trip
+async def fetch_env_with_auth(
+    db: AsyncSession,
+    username: str,
+    workspace_id: int,
+    environment_id: Optional[int] = None
+) -> Tuple[Optional[User], Optional[Workspace], Optional[Environment]]:
+    """
+    Get (user, workspace, environment) with a single query.
+    Outer joins leave the missing parts as None so callers can still tell
+    which check failed. Without environment_id the active environment is used.
+    """
+    environment_match = (
+        Environment.id == environment_id if environment_id is not None
+        else Environment.is_active == True
     )
-    return result.scalar_one_or_none() is not None
+    result = await db.execute(
+        select(User, Workspace, Environment)
+        .outerjoin(Workspace, and_(Workspace.id == workspace_id, Workspace.user_id == User.id))
+        .outerjoin(Environment, and_(Environment.workspace_id == Workspace.id, environment_match))
+        .where(User.email == username)
+        .limit(1)
+    )
+    row = result.first()
+    if not row:
+        return None, None, None
+    # Prime the request-scoped caches used by get_user_by_username / verify_workspace_ownership
+    db.info.setdefault("users_by_username", {})[username] = row.User
+    db.info.setdefault("workspace_ownership", {})[(workspace_id, row.User.id)] = row.Workspace is not None
+    return row.User, row.Workspace, row.Environment
+
+
+async def require_environment(
+    workspace_id: int,
+    environment_id: int,
+    username: str = FastAPIHeader(...),
+    db: AsyncSession = Depends(get_db)
+) -> Tuple[User, Workspace, Environment]:
+    """
+    Route dependency for /workspace/{workspace_id}/environments/{environment_id}/... endpoints.
+    Runs the combined auth/environment query and raises HTTPException with the same codes
+    the handlers used to return (400 user, 206 workspace/environment).
+    """
+    user, workspace, environment = await fetch_env_with_auth(db, username, workspace_id, environment_id)
+    if not user:
+        raise HTTPException(status_code=400, detail="User not found")
+
+    if not workspace:
+        raise HTTPException(status_code=206, detail="Workspace not found or access denied")
+
+    if not environment:
+        raise HTTPException(status_code=206, detail="Environment not found")
+
+    return user, workspace, environment
+
+
+# (username, workspace_id, environment_id or "active") -> (user_found, workspace_found, environment snapshot)
+env_cache: TTLCache = TTLCache(maxsize=ENV_CACHE_MAXSIZE, ttl=ENV_CACHE_TTL)
+
+
+async def fetch_env_snapshot(
+    db: AsyncSession,
+    username: str,
+    workspace_id: int,
+    environment_id: Optional[int] = None
+) -> Tuple[bool, bool, Optional[Dict[str, Any]]]:
+    """
+    Cached, read-only variant of fetch_env_with_auth.
+    Returns (user_found, workspace_found, environment) where environment is a plain
+    dict with id, name, variables and updated_at. The variables dict is shared between requests
+    and must not be mutated by callers.
+    """
+    key = (username, workspace_id, environment_id or "active")
+    cached = env_cache.get(key)
+    if cached is not None:
+        return cached
+
+    user, workspace, environment = await fetch_env_with_auth(db, username, workspace_id, environment_id)
+    snapshot = None
+    if environment:
+        snapshot = {
+            "id": environment.id,
+            "name": environment.name,
+            "variables": environment.variables or {},
+            "updated_at": environment.updated_at
+        }
+    cached = (user is not None, workspace is not None, snapshot)
+    if workspace is not None:
+        # Only cache authorized lookups so a new user/workspace is never shadowed by a stale miss
+        env_cache[key] = cached
+    return cached
+
+
+def invalidate_env_cache(workspace_id: int):
+    """Drop every cached environment lookup for a workspace; call after committing a change to it"""
+    for key in [key for key in list(env_cache.keys()) if key[1] == workspace_id]:
+        env_cache.pop(key, None)
 
 
 # Helper function to verify node ownership through workspace
@@ -204,6 +523,16 @@ async def verify_node_ownership(db: AsyncSession, node_id: int, user_id: int) ->
     return result.scalar_one_or_none()
 
 
+# Helper function to serialize name checks among siblings
+async def lock_sibling_names(db: AsyncSession, workspace_id: int, parent_id: Optional[int]):
+    """
+    Take a transaction-scoped advisory lock on the (workspace, parent folder) pair.
+    Callers that check a name is free and then insert it hold the lock until commit,
+    so concurrent creates/copies into the same folder cannot pick the same name.
+    """
+    await db.execute(select(func.pg_advisory_xact_lock(workspace_id, parent_id or 0)))
+
+
 # Helper function to check if parent is valid
 async def validate_parent_node(db: AsyncSession, parent_id: int, workspace_id: int) -> bool:
     """Validate that parent node exists, is a folder, and belongs to the same workspace"""
@@ -222,28 +551,6 @@ async def validate_parent_node(db: AsyncSession, parent_id: int, workspace_id: i
     return result.scalar_one_or_none() is not None
 
 
-# Helper function to check for circular reference
-async def check_circular_reference(db: AsyncSession, node_id: int, new_parent_id: int) -> bool:
-    """Check if moving a node would create a circular reference"""
-    if new_parent_id is None:
-        return False
-
-    # Get all descendant nodes
-    current_parent = new_parent_id
-    visited = set()
-
-    while current_parent is not None and current_parent not in visited:
-        if current_parent == node_id:
-            return True  # Circular reference detected
-
-        visited.add(current_parent)
-        result = await db.execute(select(Node.parent_id).where(Node.id == current_parent))
-        parent_row = result.scalar_one_or_none()
-        current_parent = parent_row if parent_row else None
-
-    return False
-
-
 # Helper function to build node path (breadcrumb)
 async def get_node_path(db: AsyncSession, node_id: int) -> List[dict]:
     """Get the path from root to the current node"""
@@ -288,6 +595,52 @@ async def verify_folder_ownership(db: AsyncSession, folder_id: int, user_id: int
     return result.scalar_one_or_none()
 
 
+# Built once at import; parameters are bound per call
+FOLDER_WITH_AUTH_QUERY = (
+    select(
+        User, Node,
+        Header.id.label("header_id"), Header.content.label("header_content"),
+        Header.created_at.label("header_created_at")
+    )
+    .outerjoin(
+        Node,
+        and_(
+            Node.id == bindparam("folder_id"),
+            exists().where(Workspace.id == Node.workspace_id, Workspace.user_id == User.id)
+        )
+    )
+    .outerjoin(Header, Header.folder_id == Node.id)
+    .where(User.email == bindparam("username"))
+    .limit(1)
+)
+
+
+async def fetch_folder_with_auth(
+    db: AsyncSession,
+    username: str,
+    folder_id: int
+) -> Tuple[Optional[User], Optional[Node], Optional[Dict[str, Any]]]:
+    """
+    Get (user, folder, header) with a single query, like fetch_env_with_auth.
+    The folder is only returned if it is in a workspace owned by the user; the header
+    is the folder's one header row (Header.folder_id is unique), projected as a plain
+    dict with id, content and created_at in the same shape as headers_map entries.
+    """
+    result = await db.execute(FOLDER_WITH_AUTH_QUERY, {"username": username, "folder_id": folder_id})
+    row = result.first()
+    if not row:
+        return None, None, None
+    db.info.setdefault("users_by_username", {})[username] = row.User
+    header = None
+    if row.header_id is not None:
+        header = {
+            "id": row.header_id,
+            "content": row.header_content,
+            "created_at": row.header_created_at
+        }
+    return row.User, row.Node, header
+
+
 # Helper function to verify header ownership
 async def verify_header_ownership(db: AsyncSession, header_id: int, user_id: int) -> Optional[Header]:
     """Verify that the header belongs to a folder in a workspace owned by the user"""
@@ -306,103 +659,102 @@ async def verify_header_ownership(db: AsyncSession, header_id: int, user_id: int
     return result.scalar_one_or_none()
 
 
-async def get_folder_path_to_root(db: AsyncSession, folder_id: int) -> List[Dict[str, Any]]:
-    """Get the path from current folder to root (including current folder)"""
-    path = []
-    current_id = folder_id
-    visited = set()
-
-    while current_id is not None and current_id not in visited:
-        visited.add(current_id)
-
-        # Get folder info
-        result = await db.execute(
-            select(Node.id, Node.name, Node.parent_id, Node.workspace_id)
-            .where(and_(Node.id == current_id))
-        )
-        folder_data = result.first()
-
-        if folder_data:
-            path.insert(0, {  # Insert at beginning to get root-to-current order
-                "id": folder_data.id,
-                "name": folder_data.name,
-                "parent_id": folder_data.parent_id,
-                "workspace_id": folder_data.workspace_id
-            })
-            current_id = folder_data.parent_id
-        else:
-            break
-
-    return path
-
+FOLDER_PATH_WITH_HEADERS_QUERY = (
+    select(
+        Node.id, Node.name, Node.parent_id, Node.workspace_id,
+        Header.id.label("header_id"), Header.content, Header.created_at
+    )
+    .join(NodeClosure, NodeClosure.ancestor_id == Node.id)
+    .outerjoin(Header, Header.folder_id == Node.id)
+    .where(NodeClosure.descendant_id == bindparam("folder_id"))
+    .order_by(NodeClosure.depth.desc())
+)
 
-async def get_headers_for_folders(db: AsyncSession, folder_ids: List[int]) -> Dict[int, Dict[str, Any]]:
-    """Get headers for multiple folders"""
-    if not folder_ids:
-        return {}
 
-    result = await db.execute(
-        select(Header.folder_id, Header.content, Header.id, Header.created_at)
-        .where(Header.folder_id.in_(folder_ids))
-    )
-    headers_data = result.fetchall()
+async def get_folder_path_with_headers(
+    db: AsyncSession,
+    folder_id: int
+) -> Tuple[List[Dict[str, Any]], Dict[int, Dict[str, Any]]]:
+    """
+    Get the root-to-folder path and the headers of every folder on it with one query.
+    folder_path is root first: [{id, name, parent_id, workspace_id}, ...];
+    headers_map is {folder_id: {id, content, created_at}} for folders that have headers.
+    """
+    result = await db.execute(FOLDER_PATH_WITH_HEADERS_QUERY, {"folder_id": folder_id})
 
+    folder_path = []
     headers_map = {}
-    for header_row in headers_data:
-        headers_map[header_row.folder_id] = {
-            "id": header_row.id,
-            "content": header_row.content,
-            "created_at": header_row.created_at
-        }
+    for row in result:
+        folder_path.append({
+            "id": row.id,
+            "name": row.name,
+            "parent_id": row.parent_id,
+            "workspace_id": row.workspace_id
+        })
+        if row.header_id is not None:
+            headers_map[row.id] = {
+                "id": row.header_id,
+                "content": row.content,
+                "created_at": row.created_at
+            }
 
-    return headers_map
+    return folder_path, headers_map
 
 
-def merge_headers_with_priority(folder_path: List[Dict], headers_map: Dict[int, Dict]) -> Dict[str, Any]:
+def merge_headers_with_priority(
+    folder_path: List[Dict],
+    headers_map: Dict[int, Dict],
+    track_details: bool = False
+) -> Dict[str, Any]:
     """
     Merge headers from root to leaf, with child headers overriding parent headers
     Priority: Root (lowest) -> ... -> Leaf (highest)
+    inheritance_info (who added/overrode which key) is only built when track_details is set.
     """
     merged_headers = {}
     inheritance_info = []
 
+    if not track_details:
+        # Fast path: later (deeper) folders simply override earlier ones
+        for folder_info in folder_path:
+            header_data = headers_map.get(folder_info["id"])
+            if header_data:
+                merged_headers.update(header_data["content"])
+        return {
+            "merged_headers": merged_headers,
+            "inheritance_info": inheritance_info
+        }
+
     # Process folders from root to leaf (left to right in path)
     for folder_info in folder_path:
         folder_id = folder_info["id"]
-        folder_name = folder_info["name"]
-
-        if folder_id in headers_map:
-            header_data = headers_map[folder_id]
-            header_content = header_data["content"]
-
-            # Track which keys come from which folder
-            folder_contribution = {
+        header_data = headers_map.get(folder_id)
+        if not header_data:
+            continue
+        header_content = header_data["content"]
+
+        # Split the folder's keys into overrides and additions with set ops on the key views,
+        # so the per-key work below is plain list building
+        overridden_keys = header_content.keys() & merged_headers.keys()
+        headers_overridden = [
+            {"key": key, "old_value": merged_headers[key], "new_value": value}
+            for key, value in header_content.items() if key in overridden_keys
+        ]
+        headers_added = [
+            {"key": key, "value": value}
+            for key, value in header_content.items() if key not in overridden_keys
+        ]
+
+        merged_headers.update(header_content)  # Override or add
+
+        # Only add to inheritance_info if this folder contributed something
+        if headers_added or headers_overridden:
+            inheritance_info.append({
                 "folder_id": folder_id,
-                "folder_name": folder_name,
-                "headers_added": [],
-                "headers_overridden": []
-            }
-
-            for key, value in header_content.items():
-                if key in merged_headers:
-                    # Key already exists, this folder overrides it
-                    folder_contribution["headers_overridden"].append({
-                        "key": key,
-                        "old_value": merged_headers[key],
-                        "new_value": value
-                    })
-                else:
-                    # New key from this folder
-                    folder_contribution["headers_added"].append({
-                        "key": key,
-                        "value": value
-                    })
-
-                merged_headers[key] = value  # Override or add
-
-            # Only add to inheritance_info if this folder contributed something
-            if folder_contribution["headers_added"] or folder_contribution["headers_overridden"]:
-                inheritance_info.append(folder_contribution)
+                "folder_name": folder_info["name"],
+                "headers_added": headers_added,
+                "headers_overridden": headers_overridden
+            })
 
     return {
         "merged_headers": merged_headers,
@@ -410,9 +762,61 @@ def merge_headers_with_priority(folder_path: List[Dict], headers_map: Dict[int,
     }
 
 
-async def get_headers(db: AsyncSession, folder_id: int):
+# folder_id -> (folder_path, headers_map) as returned by get_folder_path_with_headers
+headers_cache: TTLCache = TTLCache(maxsize=HEADERS_CACHE_MAXSIZE, ttl=HEADERS_CACHE_TTL)
+
+
+# Advanced by every invalidate_headers_cache call; get_headers only stores a result when no
+# invalidation ran while it was reading, so a read that overlapped a write can't cache stale headers
+headers_cache_generation = 0
+
+
+def invalidate_headers_cache(folder_id: int):
+    """
+    Drop cached inheritance for a folder and everything below it (any entry whose path
+    passes through it); call after committing a header change, rename, move or delete.
+    """
+    global headers_cache_generation
+    headers_cache_generation += 1
+    for key, (folder_path, _) in list(headers_cache.items()):
+        if any(folder["id"] == folder_id for folder in folder_path):
+            headers_cache.pop(key, None)
+
+
+# workspace_id -> (write generation, serialized workspace tree with APIs and test cases), see load_workspace_tree
+workspace_tree_cache: TTLCache = TTLCache(maxsize=WORKSPACE_TREE_CACHE_MAXSIZE, ttl=WORKSPACE_TREE_CACHE_TTL)
+
+
+# workspace_id -> write generation, advanced by every invalidation or in-place patch of that
+# workspace's tree; a tree read that overlapped a write is not stored (see load_workspace_tree)
+workspace_tree_generation: Dict[int, int] = {}
+
+
+def bump_workspace_tree_generation(workspace_id: int) -> int:
+    """Advance and return the workspace's tree generation; call after committing a change to it"""
+    generation = workspace_tree_generation.get(workspace_id, 0) + 1
+    workspace_tree_generation[workspace_id] = generation
+    return generation
+
+
+def invalidate_workspace_tree(*workspace_ids: int):
+    """Drop the cached tree for the given workspaces; call after committing any node, API or test case change"""
+    for workspace_id in workspace_ids:
+        bump_workspace_tree_generation(workspace_id)
+        workspace_tree_cache.pop(workspace_id, None)
+
+
+async def get_headers(db: AsyncSession, folder_id: int, track_details: bool = False):
     try:
-        folder_path = await get_folder_path_to_root(db, folder_id)
+        cached = headers_cache.get(folder_id)
+        if cached is not None:
+            folder_path, headers_map = cached
+        else:
+            # Path and headers come back together; Header.folder_id is unique so there is one row per folder
+            generation = headers_cache_generation
+            folder_path, headers_map = await get_folder_path_with_headers(db, folder_id)
+            if folder_path and generation == headers_cache_generation:
+                headers_cache[folder_id] = (folder_path, headers_map)
 
         if not folder_path:
             return {}, [], {}, {}
@@ -420,11 +824,18 @@ async def get_headers(db: AsyncSession, folder_id: int):
         # Get folder IDs for header lookup
         folder_ids = [folder["id"] for folder in folder_path]
 
-        # Get headers for all folders in the path
-        headers_map = await get_headers_for_folders(db, folder_ids)
-
         # Merge headers with proper priority (child overrides parent)
-        merge_result = merge_headers_with_priority(folder_path, headers_map)
+        merge_result = merge_headers_with_priority(folder_path, headers_map, track_details)
         return folder_path, folder_ids, headers_map, merge_result
     except Exception as e:
-        raise Exception(str(e))
\ No newline at end of file
+        raise Exception(str(e))
+
+
+async def get_headers_own_session(folder_id: int, track_details: bool = False):
+    """
+    get_headers on a sibling session, so it can run concurrently with queries on the
+    request's session (an AsyncSession cannot run two statements at once). Callers
+    must still authorize the folder before using the result.
+    """
+    async with SessionLocal() as session:
+        return await get_headers(session, folder_id, track_details)
@@ -1,12 +1,14 @@
-from sqlalchemy.exc import IntegrityError
+import asyncpg
+import logging
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 import time
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from pydantic import ValidationError
 import pytz
 from fastapi import FastAPI, HTTPException, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from config import check_db_connection, engine
+from config import check_db_connection, close_pg_pool, engine, init_pg_pool
 from models import Base
 from datetime import datetime
 from routers.runner import run_case, execute_direct
@@ -26,8 +28,10 @@ FASTAPI_CONFIG = {
     'tzinfo': pytz.timezone('Asia/Kolkata')
 }
 
+logger = logging.getLogger(__name__)
+
 # Swagger at /swagger
-app = FastAPI(docs_url="/swagger", redoc_url=None, openapi_url="/openapi.json")
+app = FastAPI(docs_url="/swagger", redoc_url=None, openapi_url="/openapi.json", default_response_class=ORJSONResponse)
 
 
 
@@ -44,13 +48,27 @@ app.add_middleware(
 )
 
 
+def create_missing_indexes(sync_conn):
+    # create_all skips tables that already exist, so indexes added to existing models need this pass
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(sync_conn, checkfirst=True)
+
+
 @app.on_event("startup")
 async def startup_event():
     # Set the timezone for the application
     datetime.now(pytz.timezone('Asia/Kolkata'))
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(create_missing_indexes)
     await check_db_connection()
+    await init_pg_pool()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await close_pg_pool()
 
 
 @app.get("/health")
@@ -108,6 +126,53 @@ async def add_process_time_header(request: Request, call_next):
     return response
 
 
+@app.exception_handler(HTTPException)
+async def http_exception_handler(request: Request, exc: HTTPException):
+    # Same body shape as create_response, so errors raised from dependencies look like handler returns
+    return JSONResponse(
+        content={
+            "response_code": exc.status_code,
+            "error_message": exc.detail,
+        },
+        status_code=exc.status_code,
+        headers=getattr(exc, "headers", None)
+    )
+
+
+@app.exception_handler(SQLAlchemyError)
+async def sqlalchemy_exception_handler(request: Request, exc: SQLAlchemyError):
+    # get_db has already rolled the session back by the time we get here. The error text carries
+    # SQL and parameters, so it goes to the log rather than to the client
+    logger.exception("Database error on %s %s", request.method, request.url.path, exc_info=exc)
+    if isinstance(exc, IntegrityError):
+        return JSONResponse(
+            content={
+                "response_code": 400,
+                "error_message": "A database integrity error occurred",
+            },
+            status_code=400
+        )
+    return JSONResponse(
+        content={
+            "response_code": status.HTTP_409_CONFLICT,
+            "error_message": "Database error",
+        },
+        status_code=409
+    )
+
+
+@app.exception_handler(asyncpg.PostgresError)
+async def asyncpg_exception_handler(request: Request, exc: asyncpg.PostgresError):
+    logger.exception("Database error on %s %s", request.method, request.url.path, exc_info=exc)
+    return JSONResponse(
+        content={
+            "response_code": status.HTTP_409_CONFLICT,
+            "error_message": "Database error",
+        },
+        status_code=409
+    )
+
+
 @app.exception_handler(Exception)
 async def unified_exception_handler(request: Request, exc: Exception):
     if isinstance(exc, ValidationError):
@@ -148,6 +213,8 @@ async def unified_exception_handler(request: Request, exc: Exception):
 
 
     else:
+        # Unexpected errors from the routers that no longer catch their own
+        logger.exception("Unhandled error on %s %s", request.method, request.url.path, exc_info=exc)
         return JSONResponse(
             content={
                 "response_code":  status.HTTP_409_CONFLICT,
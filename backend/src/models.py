@@ -1,9 +1,10 @@
 from datetime import datetime
 from typing import Optional
 from sqlalchemy import (
-    Boolean, Column, DateTime, Integer, String, Text, ForeignKey, CheckConstraint, JSON, TIMESTAMP, func, text
+    Boolean, Column, DateTime, Integer, String, Text, ForeignKey, CheckConstraint, JSON, TIMESTAMP, func, text,
+    DDL, Index, event
 )
-from sqlalchemy.orm import relationship, Mapped, mapped_column, declarative_base
+from sqlalchemy.orm import backref, relationship, Mapped, mapped_column, declarative_base
 
 Base = declarative_base()
 
@@ -89,18 +90,96 @@ class Node(Base):
     workspace_id: Mapped[int] = mapped_column(ForeignKey("workspaces.id", ondelete="CASCADE"), nullable=False)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     type: Mapped[str] = mapped_column(String(10), nullable=False)  # folder | file
-    parent_id: Mapped[int | None] = mapped_column(ForeignKey("nodes.id", ondelete="CASCADE"))
+    parent_id: Mapped[int | None] = mapped_column(ForeignKey("nodes.id", ondelete="CASCADE"), index=True)
     created_at: Mapped[str] = mapped_column(TIMESTAMP, default= datetime.now, server_default=func.now())
 
     __table_args__ = (
         CheckConstraint("type IN ('folder', 'file')", name="check_node_type"),
         CheckConstraint("(type = 'file' AND parent_id IS NOT NULL) OR (type = 'folder')", name="file_parent_not_null"),
+        # Sibling name lookups (duplicate checks, unique copy names); id and type ride along so the
+        # checks that exclude the node itself are index-only scans
+        Index(
+            "ix_nodes_workspace_parent_name", "workspace_id", "parent_id", "name",
+            postgresql_include=["id", "type"]
+        ),
     )
 
     workspace: Mapped["Workspace"] = relationship("Workspace", back_populates="nodes")
-    parent: Mapped["Node"] = relationship("Node", remote_side=[id], backref="children")
-    headers: Mapped[list["Header"]] = relationship("Header", back_populates="folder")
-    apis: Mapped[list["Api"]] = relationship("Api", back_populates="file")
+    # Child rows go with the node through ON DELETE CASCADE; passive_deletes keeps the ORM from
+    # loading them on delete
+    parent: Mapped["Node"] = relationship(
+        "Node", remote_side=[id], backref=backref("children", passive_deletes=True)
+    )
+    headers: Mapped[list["Header"]] = relationship("Header", back_populates="folder", passive_deletes=True)
+    apis: Mapped[list["Api"]] = relationship("Api", back_populates="file", passive_deletes=True)
+
+
+# ---------------------------
+# Node Closure (ancestor/descendant pairs, maintained by triggers)
+# ---------------------------
+class NodeClosure(Base):
+    __tablename__ = "node_closure"
+
+    ancestor_id: Mapped[int] = mapped_column(ForeignKey("nodes.id", ondelete="CASCADE"), primary_key=True)
+    descendant_id: Mapped[int] = mapped_column(ForeignKey("nodes.id", ondelete="CASCADE"), primary_key=True)
+    depth: Mapped[int] = mapped_column(Integer, nullable=False)  # 0 = the node itself
+
+    __table_args__ = (
+        Index("ix_node_closure_descendant_depth", "descendant_id", "depth"),
+    )
+
+
+# Rows for a new node: itself plus every ancestor of its parent, one level deeper
+event.listen(NodeClosure.__table__, "after_create", DDL("""
+CREATE OR REPLACE FUNCTION node_closure_after_insert() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO node_closure (ancestor_id, descendant_id, depth)
+    SELECT ancestor_id, NEW.id, depth + 1 FROM node_closure WHERE descendant_id = NEW.parent_id
+    UNION ALL
+    SELECT NEW.id, NEW.id, 0;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""))
+event.listen(NodeClosure.__table__, "after_create", DDL("""
+CREATE TRIGGER node_closure_insert AFTER INSERT ON nodes
+FOR EACH ROW EXECUTE FUNCTION node_closure_after_insert()
+"""))
+
+# Moving a node detaches its whole subtree from the old ancestors and attaches it under the new parent
+event.listen(NodeClosure.__table__, "after_create", DDL("""
+CREATE OR REPLACE FUNCTION node_closure_after_move() RETURNS trigger AS $$
+BEGIN
+    DELETE FROM node_closure
+    WHERE descendant_id IN (SELECT descendant_id FROM node_closure WHERE ancestor_id = NEW.id)
+      AND ancestor_id NOT IN (SELECT descendant_id FROM node_closure WHERE ancestor_id = NEW.id);
+    INSERT INTO node_closure (ancestor_id, descendant_id, depth)
+    SELECT supertree.ancestor_id, subtree.descendant_id, supertree.depth + subtree.depth + 1
+    FROM node_closure AS supertree
+    CROSS JOIN node_closure AS subtree
+    WHERE supertree.descendant_id = NEW.parent_id AND subtree.ancestor_id = NEW.id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""))
+event.listen(NodeClosure.__table__, "after_create", DDL("""
+CREATE TRIGGER node_closure_move AFTER UPDATE OF parent_id ON nodes
+FOR EACH ROW WHEN (OLD.parent_id IS DISTINCT FROM NEW.parent_id)
+EXECUTE FUNCTION node_closure_after_move()
+"""))
+
+# Backfill existing trees the first time the table is created; deletes cascade through the foreign keys
+event.listen(NodeClosure.__table__, "after_create", DDL("""
+INSERT INTO node_closure (ancestor_id, descendant_id, depth)
+WITH RECURSIVE closure (ancestor_id, descendant_id, depth) AS (
+    SELECT id, id, 0 FROM nodes
+    UNION ALL
+    SELECT nodes.parent_id, closure.descendant_id, closure.depth + 1
+    FROM closure JOIN nodes ON nodes.id = closure.ancestor_id
+    WHERE nodes.parent_id IS NOT NULL
+)
+SELECT ancestor_id, descendant_id, depth FROM closure
+"""))
 
 
 # ---------------------------
@@ -148,7 +227,8 @@ class Api(Base):
         "ApiCase",
         back_populates="api",
         cascade="all, delete-orphan",   # delete children first
-        single_parent=True              # good practice with delete-orphan
+        single_parent=True,             # good practice with delete-orphan
+        passive_deletes=True            # api_cases.api_id is ON DELETE CASCADE; don't load cases to delete them
     )
 
 # ---------------------------
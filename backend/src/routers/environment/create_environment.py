@@ -4,8 +4,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
 from models import Environment, Workspace
 from schema import EnvironmentCreate
-from config import get_db, get_user_by_username
-from utils import ExceptionHandler, create_response, value_correction
+from config import get_db, get_user_by_username, invalidate_env_cache
+from utils import create_response, value_correction
 
 router = APIRouter()
 
@@ -18,75 +18,74 @@ async def create_environment(
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new environment in a workspace"""
-    try:
-        # Get user
-        user = await get_user_by_username(db, username)
-        if not user:
-            return create_response(400, error_message="User not found")
+    # Get user
+    user = await get_user_by_username(db, username)
+    if not user:
+        return create_response(400, error_message="User not found")
 
-        # Verify workspace exists and user has access
-        workspace_query = select(Workspace).where(
-            Workspace.id == workspace_id,
-            Workspace.user_id == user.id
-        )
-        workspace_result = await db.execute(workspace_query)
-        workspace = workspace_result.scalar_one_or_none()
+    # Verify workspace exists and user has access
+    workspace_query = select(Workspace).where(
+        Workspace.id == workspace_id,
+        Workspace.user_id == user.id
+    )
+    workspace_result = await db.execute(workspace_query)
+    workspace = workspace_result.scalar_one_or_none()
 
-        if not workspace:
-            return create_response(206, error_message="Workspace not found or access denied")
+    if not workspace:
+        return create_response(206, error_message="Workspace not found or access denied")
 
-        # Check if environment name already exists in this workspace
-        existing_env_query = select(Environment).where(
-            Environment.workspace_id == workspace_id,
-            Environment.name == environment_data.name
-        )
-        existing_env_result = await db.execute(existing_env_query)
-        existing_env = existing_env_result.scalar_one_or_none()
+    # Check if environment name already exists in this workspace
+    existing_env_query = select(Environment).where(
+        Environment.workspace_id == workspace_id,
+        Environment.name == environment_data.name
+    )
+    existing_env_result = await db.execute(existing_env_query)
+    existing_env = existing_env_result.scalar_one_or_none()
 
-        if existing_env:
-            return create_response(400, error_message=f"Environment '{environment_data.name}' already exists in this workspace")
+    if existing_env:
+        return create_response(400, error_message=f"Environment '{environment_data.name}' already exists in this workspace")
 
-        # If this environment is set as active, deactivate others
-        if environment_data.is_active:
-            deactivate_query = (
-                update(Environment)
-                .where(
-                    Environment.workspace_id == workspace_id,
-                    Environment.is_active == True
-                )
-                .values(is_active=False)
+    # If this environment is set as active, deactivate others
+    if environment_data.is_active:
+        deactivate_query = (
+            update(Environment)
+            .where(
+                Environment.workspace_id == workspace_id,
+                Environment.is_active == True
             )
-            await db.execute(deactivate_query)
+            .values(is_active=False)
+        )
+        await db.execute(deactivate_query)
 
-        # Prepare variables (simple key-value format like save_variables.py)
-        variables_dict = environment_data.variables or {}
+    # Prepare variables (simple key-value format like save_variables.py)
+    variables_dict = environment_data.variables or {}
 
-        # Create the environment
-        new_environment = Environment(
-            workspace_id=workspace_id,
-            name=environment_data.name,
-            description=environment_data.description,
-            is_active=environment_data.is_active,
-            variables=variables_dict  # Direct assignment like save_variables.py
-        )
+    # Create the environment
+    new_environment = Environment(
+        workspace_id=workspace_id,
+        name=environment_data.name,
+        description=environment_data.description,
+        is_active=environment_data.is_active,
+        variables=variables_dict  # Direct assignment like save_variables.py
+    )
 
-        db.add(new_environment)
-        await db.commit()
-        await db.refresh(new_environment)
+    # The INSERT already returns the generated id and the session does not expire on commit,
+    # so no refresh is needed afterwards
+    db.add(new_environment)
+    await db.commit()
+    invalidate_env_cache(workspace_id)
 
-        # Format response data (same simple format as save_variables.py)
-        data = {
-            "id": new_environment.id,
-            "workspace_id": new_environment.workspace_id,
-            "name": new_environment.name,
-            "description": new_environment.description,
-            "is_active": new_environment.is_active,
-            "variables": new_environment.variables or {},  # Simple key-value format
-            "created_at": str(new_environment.created_at),
-            "updated_at": str(new_environment.updated_at)
-        }
+    # Format response data (same simple format as save_variables.py); request values are used
+    # directly, only the generated fields come from the inserted row
+    data = {
+        "id": new_environment.id,
+        "workspace_id": workspace_id,
+        "name": environment_data.name,
+        "description": environment_data.description,
+        "is_active": environment_data.is_active,
+        "variables": variables_dict,  # Simple key-value format
+        "created_at": str(new_environment.created_at),
+        "updated_at": str(new_environment.updated_at)
+    }
 
-        return create_response(201, value_correction(data))
-    except Exception as e:
-        await db.rollback()
-        ExceptionHandler(e)
+    return create_response(201, value_correction(data))
@@ -1,14 +1,15 @@
-from fastapi import APIRouter, Depends, Header as FastAPIHeader
-from sqlalchemy import select
+from fastapi import APIRouter, Depends
+from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Tuple
 
 from config import (
     get_db,
-    get_user_by_username
+    invalidate_env_cache,
+    require_environment
 )
-from models import Environment, Workspace
+from models import Environment, User, Workspace
 from utils import (
-    ExceptionHandler,
     create_response
 )
 
@@ -19,48 +20,24 @@ router = APIRouter()
 async def delete_environment_variables(
     workspace_id: int,
     environment_id: int,
-    username: str = FastAPIHeader(...),
+    env_ctx: Tuple[User, Workspace, Environment] = Depends(require_environment),
     db: AsyncSession = Depends(get_db)
 ):
     """Delete environment variables (similar to headers)"""
-    try:
-        # Get user
-        user = await get_user_by_username(db, username)
-        if not user:
-            return create_response(400, error_message="User not found")
+    _, _, environment = env_ctx
 
-        # Verify workspace ownership
-        workspace_result = await db.execute(
-            select(Workspace).where(
-                Workspace.id == workspace_id,
-                Workspace.user_id == user.id
-            )
-        )
-        workspace = workspace_result.scalar_one_or_none()
-        if not workspace:
-            return create_response(206, error_message="Workspace not found or access denied")
+    if not environment.variables:
+        return create_response(206, error_message="No variables found for this environment")
 
-        # Get environment
-        environment_result = await db.execute(
-            select(Environment).where(
-                Environment.id == environment_id,
-                Environment.workspace_id == workspace_id
-            )
-        )
-        environment = environment_result.scalar_one_or_none()
-        if not environment:
-            return create_response(206, error_message="Environment not found")
+    # Delete variables by setting to None/empty
+    await db.execute(
+        update(Environment)
+        .where(Environment.id == environment_id)
+        .values(variables=None)
+        .execution_options(synchronize_session=False)
+    )
 
-        if not environment.variables:
-            return create_response(206, error_message="No variables found for this environment")
+    await db.commit()
+    invalidate_env_cache(workspace_id)
 
-        # Delete variables by setting to None/empty
-        environment.variables = None
-
-        await db.commit()
-
-        return create_response(200, {"message": "Variables deleted successfully"})
-
-    except Exception as e:
-        await db.rollback()
-        ExceptionHandler(e)
+    return create_response(200, {"message": "Variables deleted successfully"})
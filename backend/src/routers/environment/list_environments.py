@@ -1,12 +1,24 @@
 # List and manage environments
+import asyncio
 from fastapi import APIRouter, Depends, Header
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete
+from sqlalchemy import exists, select, update, delete
+from sqlalchemy.orm import aliased
+from typing import Tuple
 
-from models import Environment, Workspace
+from models import Environment, User, Workspace
 from schema import EnvironmentUpdate
-from config import get_db, get_user_by_username
-from utils import ExceptionHandler, create_response, value_correction
+from config import (
+    PreparedConnection,
+    fetch_env_with_auth,
+    fetch_prepared,
+    get_db,
+    get_pg_conn,
+    get_user_by_username,
+    invalidate_env_cache,
+    require_environment
+)
+from utils import create_response, value_correction
 
 router = APIRouter()
 
@@ -15,69 +27,47 @@ router = APIRouter()
 async def list_environments(
     workspace_id: int,
     username: str = Header(...),
-    db: AsyncSession = Depends(get_db)
+    conn: PreparedConnection = Depends(get_pg_conn)
 ):
     """List all environments in a workspace"""
-    try:
-        # Get user
-        user = await get_user_by_username(db, username)
-        if not user:
-            return create_response(400, error_message="User not found")
-
-        # Verify workspace exists and user has access
-        workspace_query = select(Workspace).where(
-            Workspace.id == workspace_id,
-            Workspace.user_id == user.id
-        )
-        workspace_result = await db.execute(workspace_query)
-        workspace = workspace_result.scalar_one_or_none()
-
-        if not workspace:
-            return create_response(206, error_message="Workspace not found or access denied")
-
-        # Get all environments for this workspace
-        environments_query = select(Environment).where(
-            Environment.workspace_id == workspace_id
-        ).order_by(Environment.created_at.desc())
-
-        environments_result = await db.execute(environments_query)
-        environments = environments_result.scalars().all()
-
-        # Find active environment
-        active_environment = None
-        for env in environments:
-            if env.is_active:
-                active_environment = env
-                break
-
-        data = {
-            "environments": [
-                {
-                    "id": env.id,
-                    "name": env.name,
-                    "description": env.description,
-                    "is_active": env.is_active,
-                    "created_at": str(env.created_at) if env.created_at else None,
-                    "updated_at": str(env.updated_at) if env.updated_at else None,
-                    "workspace_id": env.workspace_id
-                } for env in environments
-            ],
-            "total_count": len(environments),
-            "active_environment": {
-                "id": active_environment.id,
-                "name": active_environment.name,
-                "description": active_environment.description,
-                "is_active": active_environment.is_active,
-                "created_at": str(active_environment.created_at) if active_environment.created_at else None,
-                "updated_at": str(active_environment.updated_at) if active_environment.updated_at else None,
-                "workspace_id": active_environment.workspace_id
-            } if active_environment else None
+    # Get user
+    user_id = await conn.prepared["get_user_id_by_email"].fetchval(username)
+    if not user_id:
+        return create_response(400, error_message="User not found")
+
+    # Verify workspace exists and user has access
+    workspace_id_row = await conn.prepared["get_ws_by_owner"].fetchval(workspace_id, user_id)
+    if not workspace_id_row:
+        return create_response(206, error_message="Workspace not found or access denied")
+
+    # Get all environments for this workspace
+    rows = await conn.prepared["list_envs_by_ws"].fetch(workspace_id)
+
+    # Build the list and pick up the active environment in the same pass
+    environments = []
+    active_environment = None
+    for row in rows:
+        env = {
+            "id": row["id"],
+            "name": row["name"].strip(),
+            "description": row["description"].strip() if row["description"] else row["description"],
+            "is_active": row["is_active"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+            "workspace_id": row["workspace_id"]
         }
+        environments.append(env)
+        if active_environment is None and env["is_active"]:
+            active_environment = env
 
-        return create_response(200, value_correction(data))
+    data = {
+        "environments": environments,
+        "total_count": len(environments),
+        "active_environment": active_environment
+    }
 
-    except Exception as e:
-        ExceptionHandler(e)
+    # Timestamps are formatted in SQL and the text columns are stripped above, so skip value_correction
+    return create_response(200, data)
 
 
 @router.get("/workspace/{workspace_id}/environments/{environment_id}")
@@ -85,59 +75,37 @@ async def get_environment(
     workspace_id: int,
     environment_id: int,
     username: str = Header(...),
-    db: AsyncSession = Depends(get_db)
+    conn: PreparedConnection = Depends(get_pg_conn)
 ):
     """Get a specific environment with its variables"""
-    try:
-        # Get user
-        user = await get_user_by_username(db, username)
-        if not user:
-            return create_response(400, error_message="User not found")
-
-        # Verify workspace exists and user has access
-        workspace_query = select(Workspace).where(
-            Workspace.id == workspace_id,
-            Workspace.user_id == user.id
-        )
-        workspace_result = await db.execute(workspace_query)
-        workspace = workspace_result.scalar_one_or_none()
-
-        if not workspace:
-            return create_response(206, error_message="Workspace not found or access denied")
-
-        # Get the environment
-        environment_query = select(Environment).where(
-            Environment.id == environment_id,
-            Environment.workspace_id == workspace_id
-        )
-        environment_result = await db.execute(environment_query)
-        environment = environment_result.scalar_one_or_none()
-
-        if not environment:
-            return create_response(206, error_message="Environment not found")
-
-        # Get environment variables
-        masked_variables = {}
-        if environment.variables:
-            for key, var_data in environment.variables.items():
-                masked_var = var_data.copy()
-                masked_variables[key] = masked_var
-
-        data = {
-            "id": environment.id,
-            "name": environment.name,
-            "description": environment.description,
-            "is_active": environment.is_active,
-            "created_at": str(environment.created_at) if environment.created_at else None,
-            "updated_at": str(environment.updated_at) if environment.updated_at else None,
-            "workspace_id": environment.workspace_id,
-            "variables": masked_variables
-        }
-
-        return create_response(200, value_correction(data))
-
-    except Exception as e:
-        ExceptionHandler(e)
+    # Get user
+    user_id = await conn.prepared["get_user_id_by_email"].fetchval(username)
+    if not user_id:
+        return create_response(400, error_message="User not found")
+
+    # Verify workspace exists and user has access
+    workspace_id_row = await conn.prepared["get_ws_by_owner"].fetchval(workspace_id, user_id)
+    if not workspace_id_row:
+        return create_response(206, error_message="Workspace not found or access denied")
+
+    # Get the environment
+    environment = await conn.prepared["get_env_by_ws"].fetchrow(environment_id, workspace_id)
+    if not environment:
+        return create_response(206, error_message="Environment not found")
+
+    data = {
+        "id": environment["id"],
+        "name": environment["name"].strip(),
+        "description": environment["description"].strip() if environment["description"] else environment["description"],
+        "is_active": environment["is_active"],
+        "created_at": environment["created_at"],
+        "updated_at": environment["updated_at"],
+        "workspace_id": environment["workspace_id"],
+        # Variable values are user data of any shape; they still get the strip/round pass
+        "variables": value_correction(environment["variables"] or {})
+    }
+
+    return create_response(200, data)
 
 
 @router.put("/workspace/{workspace_id}/environments/{environment_id}")
@@ -149,97 +117,87 @@ async def update_environment(
     db: AsyncSession = Depends(get_db)
 ):
     """Update an environment"""
-    try:
-        # Get user
-        user = await get_user_by_username(db, username)
-        if not user:
-            return create_response(400, error_message="User not found")
-
-        # Verify workspace exists and user has access
-        workspace_query = select(Workspace).where(
-            Workspace.id == workspace_id,
-            Workspace.user_id == user.id
+    # Get user
+    user = await get_user_by_username(db, username)
+    if not user:
+        return create_response(400, error_message="User not found")
+
+    # Update environment fields
+    update_data = {}
+    if environment_data.name is not None:
+        update_data["name"] = environment_data.name
+    if environment_data.description is not None:
+        update_data["description"] = environment_data.description
+    if environment_data.is_active is not None:
+        update_data["is_active"] = environment_data.is_active
+
+    # Ownership and the name conflict check are encoded in the WHERE clause, so a clash never
+    # writes the row; on a miss, fetch_env_with_auth tells which check failed
+    guards = [
+        Environment.id == environment_id,
+        Environment.workspace_id.in_(
+            select(Workspace.id).where(
+                Workspace.id == workspace_id,
+                Workspace.user_id == user.id
+            )
+        )
+    ]
+    if environment_data.name:
+        same_name = aliased(Environment)
+        guards.append(~exists().where(
+            same_name.workspace_id == workspace_id,
+            same_name.name == environment_data.name,
+            same_name.id != environment_id
+        ))
+    if update_data:
+        environment = await db.scalar(
+            update(Environment)
+            .where(*guards)
+            .values(**update_data)
+            .returning(Environment)
+            .execution_options(synchronize_session=False)
         )
-        workspace_result = await db.execute(workspace_query)
-        workspace = workspace_result.scalar_one_or_none()
+    else:
+        environment = await db.scalar(select(Environment).where(*guards))
 
+    if not environment:
+        _, workspace, environment = await fetch_env_with_auth(db, username, workspace_id, environment_id)
         if not workspace:
             return create_response(206, error_message="Workspace not found or access denied")
 
-        # Get the environment
-        environment_query = select(Environment).where(
-            Environment.id == environment_id,
-            Environment.workspace_id == workspace_id
-        )
-        environment_result = await db.execute(environment_query)
-        environment = environment_result.scalar_one_or_none()
-
         if not environment:
             return create_response(206, error_message="Environment not found")
 
-        # Check if new name conflicts with existing environments
-        if environment_data.name and environment_data.name != environment.name:
-            existing_env_query = select(Environment).where(
+        # The environment is there, so the name guard is what stopped the update
+        return create_response(400, error_message=f"Environment name '{environment_data.name}' already exists in this workspace")
+
+    # If setting this environment as active, deactivate others
+    if environment_data.is_active is True:
+        deactivate_query = (
+            update(Environment)
+            .where(
                 Environment.workspace_id == workspace_id,
-                Environment.name == environment_data.name,
+                Environment.is_active == True,
                 Environment.id != environment_id
             )
-            existing_env_result = await db.execute(existing_env_query)
-            existing_env = existing_env_result.scalar_one_or_none()
-
-            if existing_env:
-                return create_response(400, error_message=f"Environment name '{environment_data.name}' already exists in this workspace")
-
-        # If setting this environment as active, deactivate others
-        if environment_data.is_active is True and not environment.is_active:
-            deactivate_query = (
-                update(Environment)
-                .where(
-                    Environment.workspace_id == workspace_id,
-                    Environment.is_active == True,
-                    Environment.id != environment_id
-                )
-                .values(is_active=False)
-            )
-            await db.execute(deactivate_query)
-
-        # Update environment fields
-        update_data = {}
-        if environment_data.name is not None:
-            update_data["name"] = environment_data.name
-        if environment_data.description is not None:
-            update_data["description"] = environment_data.description
-        if environment_data.is_active is not None:
-            update_data["is_active"] = environment_data.is_active
-
-        if update_data:
-            update_query = (
-                update(Environment)
-                .where(Environment.id == environment_id)
-                .values(**update_data)
-            )
-            await db.execute(update_query)
-
-        await db.commit()
-
-        # Refresh and return updated environment
-        await db.refresh(environment)
+            .values(is_active=False)
+        )
+        await db.execute(deactivate_query)
 
-        data = {
-            "id": environment.id,
-            "name": environment.name,
-            "description": environment.description,
-            "is_active": environment.is_active,
-            "created_at": str(environment.created_at) if environment.created_at else None,
-            "updated_at": str(environment.updated_at) if environment.updated_at else None,
-            "workspace_id": environment.workspace_id
-        }
+    await db.commit()
+    invalidate_env_cache(workspace_id)
 
-        return create_response(200, value_correction(data))
+    data = {
+        "id": environment.id,
+        "name": environment.name,
+        "description": environment.description,
+        "is_active": environment.is_active,
+        "created_at": str(environment.created_at) if environment.created_at else None,
+        "updated_at": str(environment.updated_at) if environment.updated_at else None,
+        "workspace_id": environment.workspace_id
+    }
 
-    except Exception as e:
-        await db.rollback()
-        ExceptionHandler(e)
+    return create_response(200, value_correction(data))
 
 
 @router.post("/workspace/{workspace_id}/environments/{environment_id}/activate")
@@ -250,127 +208,88 @@ async def activate_environment(
     db: AsyncSession = Depends(get_db)
 ):
     """Set an environment as the active one for the workspace"""
-    try:
-        # Get user
-        user = await get_user_by_username(db, username)
-        if not user:
-            return create_response(400, error_message="User not found")
-
-        # Verify workspace exists and user has access
-        workspace_query = select(Workspace).where(
-            Workspace.id == workspace_id,
-            Workspace.user_id == user.id
+    # Get user
+    user = await get_user_by_username(db, username)
+    if not user:
+        return create_response(400, error_message="User not found")
+
+    # Verify workspace access (pooled connection) while the session loads the environment
+    environment_query = select(Environment).where(
+        Environment.id == environment_id,
+        Environment.workspace_id == workspace_id
+    )
+    workspace, environment_result = await asyncio.gather(
+        fetch_prepared("get_ws_by_owner", workspace_id, user.id),
+        db.execute(environment_query)
+    )
+    environment = environment_result.scalar_one_or_none()
+
+    if not workspace:
+        return create_response(206, error_message="Workspace not found or access denied")
+
+    if not environment:
+        return create_response(206, error_message="Environment not found")
+
+    # Deactivate all other environments in this workspace
+    deactivate_query = (
+        update(Environment)
+        .where(
+            Environment.workspace_id == workspace_id,
+            Environment.id != environment_id
         )
-        workspace_result = await db.execute(workspace_query)
-        workspace = workspace_result.scalar_one_or_none()
-
-        if not workspace:
-            return create_response(206, error_message="Workspace not found or access denied")
-
-        # Get the environment
-        environment_query = select(Environment).where(
-            Environment.id == environment_id,
-            Environment.workspace_id == workspace_id
-        )
-        environment_result = await db.execute(environment_query)
-        environment = environment_result.scalar_one_or_none()
-
-        if not environment:
-            return create_response(206, error_message="Environment not found")
-
-        # Deactivate all other environments in this workspace
-        deactivate_query = (
-            update(Environment)
-            .where(
-                Environment.workspace_id == workspace_id,
-                Environment.id != environment_id
-            )
-            .values(is_active=False)
-        )
-        await db.execute(deactivate_query)
-
-        # Activate the target environment
-        activate_query = (
-            update(Environment)
-            .where(Environment.id == environment_id)
-            .values(is_active=True)
-        )
-        await db.execute(activate_query)
-
-        await db.commit()
-
-        # Refresh and return updated environment
-        await db.refresh(environment)
-
-        data = {
-            "id": environment.id,
-            "name": environment.name,
-            "description": environment.description,
-            "is_active": environment.is_active,
-            "created_at": str(environment.created_at) if environment.created_at else None,
-            "updated_at": str(environment.updated_at) if environment.updated_at else None,
-            "workspace_id": environment.workspace_id
-        }
-
-        return create_response(200, value_correction(data))
-
-    except Exception as e:
-        await db.rollback()
-        ExceptionHandler(e)
+        .values(is_active=False)
+    )
+    await db.execute(deactivate_query)
+
+    # Activate the target environment; RETURNING reloads the row in place of a post-commit refresh
+    activate_query = (
+        update(Environment)
+        .where(Environment.id == environment_id)
+        .values(is_active=True)
+        .returning(Environment)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    environment = await db.scalar(activate_query)
+
+    await db.commit()
+    invalidate_env_cache(workspace_id)
+
+    data = {
+        "id": environment.id,
+        "name": environment.name,
+        "description": environment.description,
+        "is_active": environment.is_active,
+        "created_at": str(environment.created_at) if environment.created_at else None,
+        "updated_at": str(environment.updated_at) if environment.updated_at else None,
+        "workspace_id": environment.workspace_id
+    }
+
+    return create_response(200, value_correction(data))
 
 
 @router.delete("/workspace/{workspace_id}/environments/{environment_id}")
 async def delete_environment(
     workspace_id: int,
     environment_id: int,
-    username: str = Header(...),
+    env_ctx: Tuple[User, Workspace, Environment] = Depends(require_environment),
     db: AsyncSession = Depends(get_db)
 ):
     """Delete an environment and all its variables"""
-    try:
-        # Get user
-        user = await get_user_by_username(db, username)
-        if not user:
-            return create_response(400, error_message="User not found")
-
-        # Verify workspace exists and user has access
-        workspace_query = select(Workspace).where(
-            Workspace.id == workspace_id,
-            Workspace.user_id == user.id
-        )
-        workspace_result = await db.execute(workspace_query)
-        workspace = workspace_result.scalar_one_or_none()
+    _, _, environment = env_ctx
 
-        if not workspace:
-            return create_response(206, error_message="Workspace not found or access denied")
+    environment_name = environment.name
 
-        # Get the environment
-        environment_query = select(Environment).where(
-            Environment.id == environment_id,
-            Environment.workspace_id == workspace_id
-        )
-        environment_result = await db.execute(environment_query)
-        environment = environment_result.scalar_one_or_none()
-
-        if not environment:
-            return create_response(206, error_message="Environment not found")
-
-        environment_name = environment.name
+    # Delete the environment (variables are stored as JSON, so they're deleted automatically)
+    delete_env_query = delete(Environment).where(
+        Environment.id == environment_id
+    )
+    await db.execute(delete_env_query)
 
-        # Delete the environment (variables are stored as JSON, so they're deleted automatically)
-        delete_env_query = delete(Environment).where(
-            Environment.id == environment_id
-        )
-        await db.execute(delete_env_query)
-
-        await db.commit()
-
-        data = {
-            "message": f"Environment '{environment_name}' deleted successfully"
-        }
+    await db.commit()
+    invalidate_env_cache(workspace_id)
 
-        return create_response(200, value_correction(data))
+    data = {
+        "message": f"Environment '{environment_name}' deleted successfully"
+    }
 
-    except Exception as e:
-        await db.rollback()
-        ExceptionHandler(e)
+    return create_response(200, value_correction(data))
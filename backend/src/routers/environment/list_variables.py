@@ -1,16 +1,13 @@
-from fastapi import APIRouter, Depends, Header as FastAPIHeader
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Depends, Header as FastAPIHeader, Request
 
-from config import (
-    get_db,
-    get_user_by_username
-)
-from models import Environment, Workspace
+from config import PreparedConnection, get_pg_conn
 from utils import (
-    ExceptionHandler,
     create_response,
-    value_correction
+    etag_matches,
+    make_etag,
+    not_modified,
+    value_correction,
+    with_etag
 )
 
 router = APIRouter()
@@ -20,53 +17,44 @@ router = APIRouter()
 async def get_environment_variables(
     workspace_id: int,
     environment_id: int,
+    request: Request,
     username: str = FastAPIHeader(...),
-    db: AsyncSession = Depends(get_db)
+    conn: PreparedConnection = Depends(get_pg_conn)
 ):
     """Get environment variables (similar to headers)"""
-    try:
-        # Get user
-        user = await get_user_by_username(db, username)
-        if not user:
-            return create_response(400, error_message="User not found")
-
-        # Verify workspace ownership
-        workspace_result = await db.execute(
-            select(Workspace).where(
-                Workspace.id == workspace_id,
-                Workspace.user_id == user.id
-            )
-        )
-        workspace = workspace_result.scalar_one_or_none()
-        if not workspace:
-            return create_response(206, error_message="Workspace not found or access denied")
-
-        # Get environment
-        environment_result = await db.execute(
-            select(Environment).where(
-                Environment.id == environment_id,
-                Environment.workspace_id == workspace_id
-            )
-        )
-        environment = environment_result.scalar_one_or_none()
-        if not environment:
-            return create_response(206, error_message="Environment not found")
-
-        if not environment.variables:
-            return create_response(206, error_message="No variables found for this environment")
-
-        # Prepare response data
-        response_variables = environment.variables.copy()
-
-        data = {
-            "environment_id": environment.id,
-            "environment_name": environment.name,
-            "variables": response_variables,
-            "created_at": environment.created_at,
-            "updated_at": environment.updated_at
-        }
-
-        return create_response(200, value_correction(data))
-
-    except Exception as e:
-        ExceptionHandler(e)
+    # Get user
+    user_id = await conn.prepared["get_user_id_by_email"].fetchval(username)
+    if not user_id:
+        return create_response(400, error_message="User not found")
+
+    # Verify workspace ownership
+    workspace_id_row = await conn.prepared["get_ws_by_owner"].fetchval(workspace_id, user_id)
+    if not workspace_id_row:
+        return create_response(206, error_message="Workspace not found or access denied")
+
+    # Conditional GET: compare the row version before pulling the variables blob
+    if request.headers.get("if-none-match"):
+        version = await conn.prepared["get_env_version_by_ws"].fetchrow(environment_id, workspace_id)
+        if version:
+            etag = make_etag(version["id"], version["updated_at"])
+            if etag_matches(request, etag):
+                return not_modified(etag)
+
+    # Get environment
+    environment = await conn.prepared["get_env_variables_by_ws"].fetchrow(environment_id, workspace_id)
+    if not environment:
+        return create_response(206, error_message="Environment not found")
+
+    if not environment["variables"]:
+        return create_response(206, error_message="No variables found for this environment")
+
+    data = {
+        "environment_id": environment["id"],
+        "environment_name": environment["name"],
+        "variables": environment["variables"],
+        "created_at": environment["created_at"],
+        "updated_at": environment["updated_at"]
+    }
+
+    etag = make_etag(environment["id"], environment["updated_at"])
+    return with_etag(create_response(200, value_correction(data)), etag)
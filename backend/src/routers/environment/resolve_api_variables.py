@@ -3,8 +3,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Dict, Any, Optional
 from pydantic import BaseModel, Field
 
-from config import get_db, get_user_by_username
-from utils import resolve_api_variables, get_variables_from_api_data, get_environment_variables, ExceptionHandler, create_response, value_correction
+from config import fetch_env_snapshot, get_db
+from utils import replace_variables_in_api_data, get_variables_from_api_data, create_response, value_correction
 
 router = APIRouter()
 
@@ -44,6 +44,64 @@ class ApiDataResolveRequest(BaseModel):
         }
 
 
+def _resolve_api_impl(environment: Dict[str, Any], api_data: Dict[str, Any]) -> dict:
+    """Resolve variables in api_data against an environment the caller has already loaded and authorized"""
+    # Variables come from the environment snapshot fetched with the auth check; no second lookup
+    environment_variables = environment["variables"]
+
+    # Extract variables found in the API data (a set; converted to lists only for the response)
+    variables_found = get_variables_from_api_data(api_data)
+
+    # Pure substitution over the already-validated request payload
+    resolved_api_data = replace_variables_in_api_data(api_data, environment_variables)
+
+    # Determine resolved and missing variables (set ops over the dict keys)
+    variables_resolved = variables_found & environment_variables.keys()
+    variables_missing = variables_found - environment_variables.keys()
+
+    return {
+        "original_api_data": api_data,
+        "resolved_api_data": resolved_api_data,
+        "variables_found": list(variables_found),
+        "variables_resolved": list(variables_resolved),
+        "variables_missing": list(variables_missing),
+        "total_variables": len(variables_found),
+        "resolved_count": len(variables_resolved),
+        "missing_count": len(variables_missing)
+    }
+
+
+async def _resolve_api_request(
+    db: AsyncSession,
+    username: str,
+    workspace_id: int,
+    environment_id: Optional[int],
+    api_data: Dict[str, Any]
+):
+    """Shared body of both resolve-api endpoints: one auth/environment fetch, then resolution"""
+    if not environment_id:
+        # You'll need to implement logic to get active environment
+        # For now, we'll require environment_id to be provided
+        raise HTTPException(
+            status_code=400,
+            detail="environment_id is required"
+        )
+
+    # Get user, workspace access and environment (cached briefly per workspace)
+    user, workspace, environment = await fetch_env_snapshot(db, username, workspace_id, environment_id)
+    if not user:
+        return create_response(400, error_message="User not found")
+
+    if not workspace:
+        return create_response(206, error_message="Workspace not found or access denied")
+
+    if not environment:
+        return create_response(206, error_message="Environment not found")
+
+    data = _resolve_api_impl(environment, api_data)
+    return create_response(200, value_correction(data))
+
+
 @router.post("/workspace/{workspace_id}/environments/resolve-api")
 async def resolve_api_data_variables(
     workspace_id: int,
@@ -57,53 +115,9 @@ async def resolve_api_data_variables(
     This function takes any API data (url, body, headers, params, expected, etc.)
     and replaces all {{variable_name}} patterns with actual values from the environment.
     """
-    try:
-        # Get user
-        user = await get_user_by_username(db, username)
-        if not user:
-            return create_response(400, error_message="User not found")
-
-        # Extract variables found in the API data
-        variables_found = list(get_variables_from_api_data(request_data.api_data))
-
-        # Resolve variables in API data
-        if request_data.environment_id:
-            environment_id = request_data.environment_id
-        else:
-            # You'll need to implement logic to get active environment
-            # For now, we'll require environment_id to be provided
-            raise HTTPException(
-                status_code=400,
-                detail="environment_id is required"
-            )
-
-        resolved_api_data = await resolve_api_variables(
-            environment_id=environment_id,
-            api_data=request_data.api_data
-        )
-
-        # Get environment variables to determine which were resolved
-        environment_variables = await get_environment_variables(environment_id)
-
-        # Determine resolved and missing variables
-        variables_resolved = [var for var in variables_found if var in environment_variables]
-        variables_missing = [var for var in variables_found if var not in environment_variables]
-
-        data = {
-            "original_api_data": request_data.api_data,
-            "resolved_api_data": resolved_api_data,
-            "variables_found": variables_found,
-            "variables_resolved": variables_resolved,
-            "variables_missing": variables_missing,
-            "total_variables": len(variables_found),
-            "resolved_count": len(variables_resolved),
-            "missing_count": len(variables_missing)
-        }
-
-        return create_response(200, value_correction(data))
-
-    except Exception as e:
-        ExceptionHandler(e)
+    return await _resolve_api_request(
+        db, username, workspace_id, request_data.environment_id, request_data.api_data
+    )
 
 
 @router.post("/workspace/{workspace_id}/environments/{environment_id}/resolve-api")
@@ -117,16 +131,4 @@ async def resolve_api_data_with_specific_environment(
     """
     Resolve variables in API data using a specific environment
     """
-    try:
-        # Override environment_id in request
-        request_data.environment_id = environment_id
-
-        return await resolve_api_data_variables(
-            workspace_id,
-            request_data,
-            username,
-            db
-        )
-
-    except Exception as e:
-        ExceptionHandler(e)
+    return await _resolve_api_request(db, username, workspace_id, environment_id, request_data.api_data)
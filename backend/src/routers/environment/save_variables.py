@@ -1,17 +1,18 @@
 from fastapi import APIRouter, Depends, Header as FastAPIHeader
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
 from config import (
+    fetch_env_with_auth,
     get_db,
-    get_user_by_username
+    invalidate_env_cache
 )
-from models import Environment, Workspace
+from models import Environment, User, Workspace
 from schema import (
     VariablesSetRequest
 )
 from utils import (
-    ExceptionHandler,
     create_response,
     value_correction
 )
@@ -28,59 +29,59 @@ async def save_environment_variables(
     db: AsyncSession = Depends(get_db)
 ):
     """Save environment variables (creates if not exists, updates if exists - similar to headers)"""
-    try:
-        # Get user
-        user = await get_user_by_username(db, username)
-        if not user:
-            return create_response(400, error_message="User not found")
+    # Convert VariablesSetRequest to simple dict format for JSON storage
+    variables_dict = variables_data.variables  # Direct assignment since it's already Dict[str, str]
 
-        # Verify workspace ownership
-        workspace_result = await db.execute(
-            select(Workspace).where(
-                Workspace.id == workspace_id,
-                Workspace.user_id == user.id
-            )
+    # Authorize and save in one statement: the UPDATE only matches an environment in a workspace the
+    # user owns, and the self-join hands back the pre-update variables to tell create from update
+    previous = aliased(Environment)
+    owned_workspace_id = (
+        select(Workspace.id)
+        .join(User, User.id == Workspace.user_id)
+        .where(Workspace.id == workspace_id, User.email == username)
+        .scalar_subquery()
+    )
+    saved = (await db.execute(
+        update(Environment)
+        .where(
+            Environment.id == environment_id,
+            Environment.workspace_id == owned_workspace_id,
+            previous.id == Environment.id
         )
-        workspace = workspace_result.scalar_one_or_none()
-        if not workspace:
-            return create_response(206, error_message="Workspace not found or access denied")
-
-        # Verify environment exists in this workspace
-        environment_result = await db.execute(
-            select(Environment).where(
-                Environment.id == environment_id,
-                Environment.workspace_id == workspace_id
-            )
+        .values(variables=variables_dict)
+        .returning(
+            Environment.id, Environment.name, Environment.created_at, Environment.updated_at,
+            previous.variables.label("previous_variables")
         )
-        environment = environment_result.scalar_one_or_none()
-        if not environment:
-            return create_response(206, error_message="Environment not found")
+        .execution_options(synchronize_session=False)
+    )).first()
 
-        # Convert VariablesSetRequest to simple dict format for JSON storage
-        variables_dict = variables_data.variables  # Direct assignment since it's already Dict[str, str]
+    if saved is None:
+        # Nothing was written; look up which check failed to keep the usual error responses
+        user, workspace, _ = await fetch_env_with_auth(db, username, workspace_id, environment_id)
+        if not user:
+            return create_response(400, error_message="User not found")
 
-        # Determine if this is create or update
-        is_create = environment.variables is None or len(environment.variables) == 0
+        if not workspace:
+            return create_response(206, error_message="Workspace not found or access denied")
 
-        # Save variables (create or update)
-        environment.variables = variables_dict
+        return create_response(206, error_message="Environment not found")
 
-        await db.commit()
-        await db.refresh(environment)
+    await db.commit()
+    invalidate_env_cache(workspace_id)
 
-        # Prepare response data (same format as list_variables.py)
-        data = {
-            "environment_id": environment.id,
-            "environment_name": environment.name,
-            "variables": variables_dict,
-            "created_at": environment.created_at,
-            "updated_at": environment.updated_at
-        }
+    # Determine if this is create or update
+    is_create = not saved.previous_variables
 
-        # Return appropriate status code
-        status_code = 201 if is_create else 200
-        return create_response(status_code, value_correction(data))
+    # Prepare response data (same format as list_variables.py)
+    data = {
+        "environment_id": saved.id,
+        "environment_name": saved.name,
+        "variables": variables_dict,
+        "created_at": saved.created_at,
+        "updated_at": saved.updated_at
+    }
 
-    except Exception as e:
-        await db.rollback()
-        ExceptionHandler(e)
+    # Return appropriate status code
+    status_code = 201 if is_create else 200
+    return create_response(status_code, value_correction(data))
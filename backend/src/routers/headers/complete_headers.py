@@ -1,22 +1,19 @@
+import asyncio
 from fastapi import APIRouter, Depends, Header as FastAPIHeader
-from sqlalchemy import select, and_
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Dict, Any
 
-from config import get_db, get_user_by_username, verify_folder_ownership, get_headers
-from models import Node, Header
-from utils import ExceptionHandler, create_response, value_correction
+from config import fetch_folder_with_auth, get_db, get_headers_own_session
+from utils import create_response, value_correction
 
 router = APIRouter()
 
 
-
-
 @router.get("/{folder_id}/headers/complete")
 async def get_complete_folder_headers(
     folder_id: int,
     username: str = FastAPIHeader(...),
     include_inheritance_details: bool = FastAPIHeader(False, alias="include-details"),
+    response_content: str = FastAPIHeader("full", alias="x-response-content"),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -25,53 +22,73 @@ async def get_complete_folder_headers(
 
     Path: folder1 -> folder2 -> folder3 -> folder4
     Priority: folder1 (lowest) -> folder2 -> folder3 -> folder4 (highest)
-    """
-    try:
-        # Get user
-        user = await get_user_by_username(db, username)
-        if not user:
-            return create_response(400, error_message="User not found")
-
-        # Verify folder ownership
-        target_folder = await verify_folder_ownership(db, folder_id, user.id)
-        if not target_folder:
-            return create_response(206, error_message="Folder not found or access denied")
-
-        # Get path from root to target folder
-        folder_path, folder_ids, headers_map, merge_result = await get_headers(db, folder_id)
-        if not folder_path:
-            return create_response(206, error_message="Folder not found")
-
-        # Prepare response data
-        data = {
-            "folder_id": folder_id,
-            "folder_name": target_folder.name,
-            "workspace_id": target_folder.workspace_id,
-            "complete_headers": merge_result["merged_headers"],
-            "headers_count": len(merge_result["merged_headers"]),
-            "inheritance_path": [
-                {
-                    "id": folder["id"],
-                    "name": folder["name"],
-                    "has_headers": folder["id"] in headers_map
-                } for folder in folder_path
-            ],
-            "folders_with_headers": len([f_id for f_id in folder_ids if f_id in headers_map])
-        }
 
-        # Add detailed inheritance information if requested
-        if include_inheritance_details:
-            data["inheritance_details"] = merge_result["inheritance_info"]
-            data["raw_headers_by_folder"] = {
-                str(folder_id): headers_map.get(folder_id, {}).get("content", {})
-                for folder_id in folder_ids
-                if folder_id in headers_map
-            }
-
-        return create_response(200, value_correction(data))
+    Send `X-Response-Content: minimal` to get only complete_headers and headers_count.
+    """
+    minimal = response_content.lower() == "minimal"
+    if minimal:
+        # Inheritance details are never rendered in minimal mode
+        include_inheritance_details = False
+
+    # Authorize and load the root-to-folder path concurrently; the path is only used once authorized
+    (user, target_folder, _), (folder_path, _, headers_map, merge_result) = await asyncio.gather(
+        fetch_folder_with_auth(db, username, folder_id),
+        get_headers_own_session(folder_id, track_details=include_inheritance_details)
+    )
+    if not user:
+        return create_response(400, error_message="User not found")
+
+    if not target_folder:
+        return create_response(206, error_message="Folder not found or access denied")
+
+    if not folder_path:
+        return create_response(206, error_message="Folder not found")
+
+    # Header content is user data of any shape, so it still gets the strip/round pass
+    merged_headers = value_correction(merge_result["merged_headers"])
+    if minimal:
+        # Skip building the inheritance path entirely
+        return create_response(200, {
+            "complete_headers": merged_headers,
+            "headers_count": len(merged_headers)
+        })
+
+    # One pass over the path builds the inheritance path, the count and the raw per-folder headers
+    inheritance_path = []
+    folders_with_headers = 0
+    raw_headers_by_folder = {}
+    for folder in folder_path:
+        f_id = folder["id"]
+        header_data = headers_map.get(f_id)
+        if header_data is not None:
+            folders_with_headers += 1
+            raw_headers_by_folder[str(f_id)] = header_data["content"]
+        inheritance_path.append({
+            "id": f_id,
+            "name": folder["name"].strip(),
+            "has_headers": header_data is not None
+        })
+
+    # Prepare response data
+    data = {
+        "folder_id": folder_id,
+        "folder_name": target_folder.name.strip(),
+        "workspace_id": target_folder.workspace_id,
+        "complete_headers": merged_headers,
+        "headers_count": len(merged_headers),
+        "inheritance_path": inheritance_path,
+        "folders_with_headers": folders_with_headers
+    }
+
+    # Add detailed inheritance information if requested
+    if include_inheritance_details:
+        data["inheritance_details"] = value_correction(merge_result["inheritance_info"])
+        data["raw_headers_by_folder"] = value_correction(raw_headers_by_folder)
+
+    # Names and header values are stripped above; the rest is ids and counts, so the payload
+    # skips another value_correction walk
+    return create_response(200, data)
 
-    except Exception as e:
-        ExceptionHandler(e)
 
 
 # Bonus: Get inheritance preview (useful for UI)
@@ -85,53 +102,50 @@ async def get_headers_inheritance_preview(
     Get a preview of header inheritance without merging.
     Shows what headers each folder contributes separately.
     """
-    try:
-        # Get user
-        user = await get_user_by_username(db, username)
-        if not user:
-            return create_response(400, error_message="User not found")
-
-        # Verify folder ownership
-        target_folder = await verify_folder_ownership(db, folder_id, user.id)
-        if not target_folder:
-            return create_response(206, error_message="Folder not found or access denied")
-
-        # Get path from root to target folder
-        folder_path, folder_ids, headers_map, merge_result = await get_headers(db, folder_id)
-        if not folder_path:
-            return create_response(206, error_message="Folder not found")
-
-        # Build inheritance preview
-        inheritance_preview = []
-        for i, folder_info in enumerate(folder_path):
-            folder_id_iter = folder_info["id"]
-            folder_data = {
-                "level": i + 1,
-                "folder_id": folder_id_iter,
-                "folder_name": folder_info["name"],
-                "has_headers": folder_id_iter in headers_map,
-                "headers": {},
-                "headers_count": 0
-            }
-
-            if folder_id_iter in headers_map:
-                header_content = headers_map[folder_id_iter]["content"]
-                folder_data["headers"] = header_content
-                folder_data["headers_count"] = len(header_content)
-                folder_data["header_id"] = headers_map[folder_id_iter]["id"]
-                folder_data["created_at"] = headers_map[folder_id_iter]["created_at"]
-
-            inheritance_preview.append(folder_data)
-
-        data = {
-            "target_folder_id": folder_id,
-            "target_folder_name": target_folder.name,
-            "inheritance_path": inheritance_preview,
-            "total_levels": len(folder_path),
-            "folders_with_headers": len([f for f in inheritance_preview if f["has_headers"]])
+    # Authorize and load the root-to-folder path concurrently; the path is only used once authorized
+    (user, target_folder, _), (folder_path, folder_ids, headers_map, merge_result) = await asyncio.gather(
+        fetch_folder_with_auth(db, username, folder_id),
+        get_headers_own_session(folder_id)
+    )
+    if not user:
+        return create_response(400, error_message="User not found")
+
+    if not target_folder:
+        return create_response(206, error_message="Folder not found or access denied")
+
+    if not folder_path:
+        return create_response(206, error_message="Folder not found")
+
+    # Build inheritance preview
+    inheritance_preview = []
+    for i, folder_info in enumerate(folder_path):
+        folder_id_iter = folder_info["id"]
+        folder_data = {
+            "level": i + 1,
+            "folder_id": folder_id_iter,
+            "folder_name": folder_info["name"].strip(),
+            "has_headers": folder_id_iter in headers_map,
+            "headers": {},
+            "headers_count": 0
         }
 
-        return create_response(200, value_correction(data))
-
-    except Exception as e:
-        ExceptionHandler(e)
\ No newline at end of file
+        if folder_id_iter in headers_map:
+            header_content = headers_map[folder_id_iter]["content"]
+            folder_data["headers"] = value_correction(header_content)
+            folder_data["headers_count"] = len(header_content)
+            folder_data["header_id"] = headers_map[folder_id_iter]["id"]
+            folder_data["created_at"] = headers_map[folder_id_iter]["created_at"]
+
+        inheritance_preview.append(folder_data)
+
+    data = {
+        "target_folder_id": folder_id,
+        "target_folder_name": target_folder.name.strip(),
+        "inheritance_path": inheritance_preview,
+        "total_levels": len(folder_path),
+        "folders_with_headers": len([f for f in inheritance_preview if f["has_headers"]])
+    }
+
+    # Names and header values are stripped above and the response encoder formats created_at,
+    # so skip the full re-walk
+    return create_response(200, data)
@@ -1,20 +1,26 @@
 from fastapi import APIRouter, Depends, Header as FastAPIHeader
-from sqlalchemy import select
+from sqlalchemy import bindparam, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from config import (
+    fetch_folder_with_auth,
     get_db,
-    get_user_by_username,
-    verify_folder_ownership
+    invalidate_headers_cache
 )
 from models import Header
 from utils import (
-    ExceptionHandler,
     create_response
 )
 
 router = APIRouter()
 
+DELETE_HEADER_BY_FOLDER = (
+    delete(Header)
+    .where(Header.folder_id == bindparam("fid"))
+    .returning(Header.id)
+    .execution_options(synchronize_session=False)
+)
+
 @router.delete("/{folder_id}/headers")
 async def delete_folder_headers(
     folder_id: int,
@@ -22,29 +28,20 @@ async def delete_folder_headers(
     db: AsyncSession = Depends(get_db)
 ):
     """Delete the folder's header (no header_id needed since only one header per folder)"""
-    try:
-        user = await get_user_by_username(db, username)
-        if not user:
-            return create_response(400, error_message="User not found")
-
-        folder = await verify_folder_ownership(db, folder_id, user.id)
-        if not folder:
-            return create_response(206, error_message="Folder not found or access denied")
-
-        # Get the header for this folder
-        result = await db.execute(
-            select(Header).where(Header.folder_id == folder_id)
-        )
-        header = result.scalar_one_or_none()
-
-        if not header:
-            return create_response(206, error_message="No headers found for this folder")
-
-        # Delete header
-        await db.delete(header)
-        await db.commit()
-
-        return create_response(200, {"message": "Headers deleted successfully"})
-    except Exception as e:
-        await db.rollback()
-        ExceptionHandler(e)
\ No newline at end of file
+    # Get user and folder ownership in one query
+    user, folder, _ = await fetch_folder_with_auth(db, username, folder_id)
+    if not user:
+        return create_response(400, error_message="User not found")
+
+    if not folder:
+        return create_response(206, error_message="Folder not found or access denied")
+
+    # Delete header in one statement; RETURNING doubles as the existence check
+    deleted = (await db.execute(DELETE_HEADER_BY_FOLDER, {"fid": folder_id})).first()
+    if not deleted:
+        return create_response(206, error_message="No headers found for this folder")
+
+    await db.commit()
+    invalidate_headers_cache(folder_id)
+
+    return create_response(200, {"message": "Headers deleted successfully"})
\ No newline at end of file
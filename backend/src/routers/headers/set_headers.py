@@ -1,24 +1,31 @@
 from fastapi import APIRouter, Depends, Header as FastAPIHeader
-from sqlalchemy import select
+from sqlalchemy import JSON, bindparam
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from config import (
+    fetch_folder_with_auth,
     get_db,
-    get_user_by_username,
-    verify_folder_ownership
+    invalidate_headers_cache
 )
 from models import Header
 from schema import (
     HeaderCreateRequest
 )
 from utils import (
-    ExceptionHandler,
     create_response,
     value_correction
 )
 
 router = APIRouter()
 
+INSERT_HEADER_IF_ABSENT = (
+    pg_insert(Header)
+    .values(folder_id=bindparam("fid"), content=bindparam("new_content", type_=JSON))
+    .on_conflict_do_nothing(index_elements=[Header.folder_id])
+    .returning(Header.id, Header.created_at)
+)
+
 
 @router.post("/{folder_id}/headers")
 async def set_folder_headers(
@@ -28,45 +35,34 @@ async def set_folder_headers(
     db: AsyncSession = Depends(get_db)
 ):
     """Set/create folder-level headers"""
-    try:
-        # Get user
-        user = await get_user_by_username(db, username)
-        if not user:
-            return create_response(400, error_message="User not found")
+    # Get user, folder ownership and the folder's header in one query
+    user, folder, header = await fetch_folder_with_auth(db, username, folder_id)
+    if not user:
+        return create_response(400, error_message="User not found")
 
-        # Verify folder ownership and type
-        folder = await verify_folder_ownership(db, folder_id, user.id)
-        if not folder:
-            return create_response(206, error_message="Folder not found or access denied")
+    if not folder:
+        return create_response(206, error_message="Folder not found or access denied")
 
-        result = await db.execute(
-            select(Header)
-            .where(
-                Header.folder_id == folder_id
-            )
-        )
-        if result.scalar_one_or_none():
-            return create_response(400, error_message="Header already exists")
+    if header:
+        return create_response(400, error_message="Header already exists")
 
-        # Create new header
-        new_header = Header(
-            folder_id=folder_id,
-            content=header_data.content
-        )
+    # Create new header; ON CONFLICT closes the race with a concurrent create for the same folder
+    created = (await db.execute(
+        INSERT_HEADER_IF_ABSENT, {"fid": folder_id, "new_content": header_data.content}
+    )).first()
+    if created is None:
+        await db.rollback()
+        return create_response(400, error_message="Header already exists")
 
-        db.add(new_header)
-        await db.commit()
-        await db.refresh(new_header)
+    await db.commit()
+    invalidate_headers_cache(folder_id)
 
-        data = {
-            "id": new_header.id,
-            "folder_id": new_header.folder_id,
-            "content": new_header.content,
-            "created_at": new_header.created_at
-        }
+    data = {
+        "id": created.id,
+        "folder_id": folder_id,
+        "content": header_data.content,
+        "created_at": created.created_at
+    }
 
-        return create_response(201, value_correction(data))
+    return create_response(201, value_correction(data))
 
-    except Exception as e:
-        await db.rollback()
-        ExceptionHandler(e)
@@ -1,24 +1,31 @@
 from fastapi import APIRouter, Depends, Header as FastAPIHeader
-from sqlalchemy import select, and_
+from sqlalchemy import JSON, and_, bindparam, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from config import (
+    fetch_folder_with_auth,
     get_db,
-    get_user_by_username,
-    verify_folder_ownership
+    invalidate_headers_cache
 )
 from models import Header
 from schema import (
     HeaderUpdateRequest
 )
 from utils import (
-    ExceptionHandler,
     create_response,
     value_correction
 )
 
 router = APIRouter()
 
+UPDATE_HEADER_BY_FOLDER = (
+    update(Header)
+    .where(Header.folder_id == bindparam("fid"))
+    .values(content=bindparam("new_content", type_=JSON))
+    .returning(Header.id, Header.content, Header.created_at)
+    .execution_options(synchronize_session=False)
+)
+
 
 @router.put("/{folder_id}/headers")
 async def update_folder_headers(
@@ -28,41 +35,32 @@ async def update_folder_headers(
     db: AsyncSession = Depends(get_db)
 ):
     """Update the folder's header (no header_id needed since only one header per folder)"""
-    try:
-        user = await get_user_by_username(db, username)
-        if not user:
-            return create_response(400, error_message="User not found")
-
-        folder = await verify_folder_ownership(db, folder_id, user.id)
-        if not folder:
-            return create_response(206, error_message="Folder not found or access denied")
-
-        # Get the header for this folder
-        result = await db.execute(
-            select(Header).where(Header.folder_id == folder_id)
-        )
-        header = result.scalar_one_or_none()
+    # Get user and folder ownership in one query
+    user, folder, _ = await fetch_folder_with_auth(db, username, folder_id)
+    if not user:
+        return create_response(400, error_message="User not found")
 
-        if not header:
-            return create_response(206, error_message="No headers found for this folder")
+    if not folder:
+        return create_response(206, error_message="Folder not found or access denied")
 
-        # Update header content
-        header.content = header_data.content
+    # Update header content in one statement; RETURNING doubles as the existence check
+    header = (await db.execute(
+        UPDATE_HEADER_BY_FOLDER, {"fid": folder_id, "new_content": header_data.content}
+    )).first()
+    if not header:
+        return create_response(206, error_message="No headers found for this folder")
 
-        await db.commit()
-        await db.refresh(header)
+    await db.commit()
+    invalidate_headers_cache(folder_id)
 
-        data = {
-            "id": header.id,
-            "folder_id": header.folder_id,
-            "content": header.content,
-            "created_at": header.created_at,
-            "folder_name": folder.name
-        }
+    data = {
+        "id": header.id,
+        "folder_id": folder_id,
+        "content": header.content,
+        "created_at": header.created_at,
+        "folder_name": folder.name
+    }
 
-        return create_response(200, value_correction(data))
+    return create_response(200, value_correction(data))
 
-    except Exception as e:
-        await db.rollback()
-        ExceptionHandler(e)
 
@@ -1,90 +1,151 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
-from sqlalchemy.orm import selectinload
-from models import Node, Workspace, Api, ApiCase
+from sqlalchemy import bindparam, select, and_, exists, text
+from sqlalchemy.orm import aliased
+from models import Node, NodeClosure, Workspace
 from config import get_db
 from schema import NodeCopyRequest
 from typing import Optional
-import logging
 
-from utils import ExceptionHandler, create_response, get_unique_name, value_correction
-from routers.workspace.list_workspace_tree import build_file_tree
+from utils import create_response, get_unique_name
+from routers.workspace.list_workspace_tree import graft_workspace_tree, load_workspace_tree
 
 router = APIRouter()
-logger = logging.getLogger(__name__)
 
-async def copy_node_recursive(
-    source_node: Node,
+# Copies a whole subtree server-side in one statement. New ids are drawn from the sequences
+# up front so parent links, API file ids and case api ids can be remapped with joins. Every
+# CTE reads the same snapshot, so copying a folder into its own subtree only copies the
+# original nodes. Nodes are inserted parents first so the node_closure trigger sees each
+# parent's ancestry before its children.
+COPY_SUBTREE_QUERY = text("""
+WITH src AS MATERIALIZED (
+    SELECT nodes.id, nodes.parent_id, nodes.name, nodes.type, node_closure.depth,
+           nextval(pg_get_serial_sequence('nodes', 'id')) AS new_id
+    FROM nodes
+    JOIN node_closure ON node_closure.descendant_id = nodes.id
+    WHERE node_closure.ancestor_id = :source_id
+),
+api_src AS MATERIALIZED (
+    SELECT apis.id, apis.method, apis.endpoint, apis.description, apis.is_active, apis.extra_meta,
+           apis.created_at, src.new_id AS new_file_id,
+           CASE WHEN src.depth = 0 THEN :new_name ELSE src.name END AS new_name,
+           nextval(pg_get_serial_sequence('apis', 'id')) AS new_api_id
+    FROM apis
+    JOIN src ON src.id = apis.file_id
+),
+inserted_nodes AS (
+    INSERT INTO nodes (id, workspace_id, parent_id, name, type)
+    SELECT src.new_id,
+           :target_workspace_id,
+           CASE WHEN src.depth = 0 THEN CAST(:target_parent_id AS INTEGER) ELSE parent.new_id END,
+           CASE WHEN src.depth = 0 THEN :new_name ELSE src.name END,
+           src.type
+    FROM src
+    LEFT JOIN src AS parent ON parent.id = src.parent_id AND src.depth > 0
+    ORDER BY src.depth, src.id
+    RETURNING id
+),
+inserted_apis AS (
+    INSERT INTO apis (id, file_id, name, method, endpoint, description, is_active, extra_meta, created_at)
+    SELECT new_api_id, new_file_id, new_name, method, endpoint, description, is_active, extra_meta, created_at
+    FROM api_src
+    RETURNING id
+),
+inserted_cases AS (
+    INSERT INTO api_cases (api_id, name, params, headers, body, expected, created_at)
+    SELECT api_src.new_api_id, api_cases.name, api_cases.params, api_cases.headers,
+           api_cases.body, api_cases.expected, api_cases.created_at
+    FROM api_cases
+    JOIN api_src ON api_src.id = api_cases.api_id
+    ORDER BY api_cases.id
+    RETURNING id
+)
+SELECT new_id FROM src WHERE depth = 0
+""")
+
+
+async def copy_node_subtree(
+    source_id: int,
     target_workspace_id: int,
     target_parent_id: Optional[int],
     new_name: str,
     db: AsyncSession
-) -> Node:
+) -> int:
     """
-    Recursively copy a node and all its children
+    Copy a node and all its descendants (with their APIs and test cases) in a single
+    INSERT ... SELECT statement. Returns the id of the copied root node.
     """
-    # Create the copied node
-    copied_node = Node(
-        name=new_name,
-        type=source_node.type,
-        workspace_id=target_workspace_id,
-        parent_id=target_parent_id
+    result = await db.execute(
+        COPY_SUBTREE_QUERY,
+        {
+            "source_id": source_id,
+            "target_workspace_id": target_workspace_id,
+            "target_parent_id": target_parent_id,
+            "new_name": new_name
+        }
+    )
+    return result.scalar_one()
+
+copy_target_folder = aliased(Node)
+# Source node columns plus the target checks shared by copy and move. Built once at import; the
+# outer joins leave whichever target is missing as None, and into_own_subtree tells whether the
+# target folder lies in the source's own subtree
+COPY_SOURCE_QUERY = (
+    select(
+        Node.id,
+        Node.name,
+        Node.type,
+        Node.workspace_id,
+        Workspace.id.label("target_workspace_id"),
+        copy_target_folder.id.label("target_folder_id"),
+        copy_target_folder.workspace_id.label("target_folder_workspace_id"),
+        exists().where(
+            NodeClosure.ancestor_id == Node.id,
+            NodeClosure.descendant_id == copy_target_folder.id
+        ).label("into_own_subtree")
     )
+    .outerjoin(Workspace, Workspace.id == bindparam("target_workspace_id"))
+    .outerjoin(
+        copy_target_folder,
+        and_(
+            copy_target_folder.id == bindparam("target_folder_id"),
+            copy_target_folder.type == "folder"
+        )
+    )
+    .where(Node.id == bindparam("node_id"))
+)
+
+
+async def fetch_copy_source(db: AsyncSession, node_id: int, request: NodeCopyRequest):
+    """Source node and target checks for a copy/move in one round trip; None when the node doesn't exist"""
+    result = await db.execute(
+        COPY_SOURCE_QUERY,
+        {
+            "node_id": node_id,
+            "target_workspace_id": request.target_workspace_id,
+            "target_folder_id": request.target_folder_id
+        }
+    )
+    return result.first()
 
-    db.add(copied_node)
-    await db.flush()  # Get the ID without committing
 
-    # If it's a file node, copy associated API data and test cases
-    if source_node.type == "file":
-        # Copy API data if exists
-        result = await db.execute(
-            select(Api).options(selectinload(Api.cases)).where(Api.file_id == source_node.id)
-        )
-        source_api = result.scalar_one_or_none()
-
-        if source_api:
-            copied_api = Api(
-                file_id=copied_node.id,
-                name=new_name,
-                method=source_api.method,
-                endpoint=source_api.endpoint,
-                description=source_api.description,
-                is_active=source_api.is_active,
-                extra_meta=source_api.extra_meta,
-                created_at=source_api.created_at,
-            )
-            db.add(copied_api)
-            await db.flush()
-
-            # Copy test cases
-            for source_case in source_api.cases:
-                copied_test_case = ApiCase(
-                    api_id=copied_api.id,
-                    name=source_case.name,
-                    params=source_case.params,
-                    headers=source_case.headers,
-                    body=source_case.body,
-                    expected=source_case.expected,
-                    created_at=source_case.created_at,
-                )
-                db.add(copied_test_case)
-
-    # If it's a folder, recursively copy all children
-    elif source_node.type == "folder":
-        result = await db.execute(select(Node).where(Node.parent_id == source_node.id))
-        children = result.scalars().all()
-
-        for child in children:
-            await copy_node_recursive(
-                child,
-                target_workspace_id,
-                copied_node.id,
-                child.name,
-                db
-            )
-
-    return copied_node
+def copy_target_error(source, request: NodeCopyRequest):
+    """The error response for a missing source node or an invalid copy/move target, else None"""
+    if not source:
+        return create_response(206, error_message="Node not found")
+
+    # Verify target workspace exists
+    if source.target_workspace_id is None:
+        return create_response(206, error_message="Target workspace not found")
+
+    # Verify target folder exists if specified
+    if request.target_folder_id:
+        if source.target_folder_id is None:
+            return create_response(206, error_message="Target folder not found")
+        # Ensure target folder is in the target workspace
+        if source.target_folder_workspace_id != request.target_workspace_id:
+            return create_response(400, error_message="Target folder must be in the target workspace")
+    return None
 
 @router.post("/{node_id}/copy")
 async def copy_node(
@@ -97,105 +158,35 @@ async def copy_node(
     Handles name conflicts by appending 'copy', 'copy 2', etc.
     Returns the full workspace tree structure (like list_workspace_tree).
     """
-    try:
-        # Get the node to copy
-        result = await db.execute(select(Node).where(Node.id == node_id))
-        source_node = result.scalar_one_or_none()
-        if not source_node:
-            return create_response(206, error_message="Node not found")
-
-        # Verify target workspace exists
-        result = await db.execute(select(Workspace).where(Workspace.id == request.target_workspace_id))
-        target_workspace = result.scalar_one_or_none()
-        if not target_workspace:
-            return create_response(206, error_message="Target workspace not found")
-
-        # Verify target folder exists if specified
-        if request.target_folder_id:
-            result = await db.execute(
-                select(Node).where(
-                    Node.id == request.target_folder_id,
-                    Node.type == "folder"
-                )
-            )
-            target_folder = result.scalar_one_or_none()
-            if not target_folder:
-                return create_response(206, error_message="Target folder not found")
-            # Ensure target folder is in the target workspace
-            if target_folder.workspace_id != request.target_workspace_id:
-                return create_response(400, error_message="Target folder must be in the target workspace")
-
-        # Generate a unique name in the target location
-        unique_name = await get_unique_name(
-            request.new_name or source_node.name,
-            request.target_workspace_id,
-            request.target_folder_id,
-            db
-        )
-
-        # Perform the copy operation
-        copied_node = await copy_node_recursive(
-            source_node,
-            request.target_workspace_id,
-            request.target_folder_id,
-            unique_name,
-            db
-        )
+    # Source node and target checks in one round trip
+    row = await fetch_copy_source(db, node_id, request)
+    error = copy_target_error(row, request)
+    if error:
+        return error
+
+    # Generate a unique name in the target location
+    unique_name = await get_unique_name(
+        request.new_name or row.name,
+        request.target_workspace_id,
+        request.target_folder_id,
+        db
+    )
 
-        await db.commit()
+    # Perform the copy operation
+    copied_node_id = await copy_node_subtree(
+        row.id,
+        request.target_workspace_id,
+        request.target_folder_id,
+        unique_name,
+        db
+    )
 
+    await db.commit()
 
-        # Fetch the updated workspace and nodes
-        result = await db.execute(
-            select(Workspace)
-            .options(selectinload(Workspace.nodes))
-            .where(Workspace.id == request.target_workspace_id)
-        )
-        workspace = result.scalar_one_or_none()
-        if not workspace:
-            return create_response(206, error_message="Workspace not found after copy.")
-
-        apis_dict = {}
-        total_apis = 0
-        total_test_cases = 0
-
-        # Fetch all APIs with test cases for this workspace
-        apis_result = await db.execute(
-            select(Api)
-            .join(Node, Api.file_id == Node.id)
-            .options(selectinload(Api.cases))
-            .where(
-                and_(
-                    Node.workspace_id == request.target_workspace_id,
-                    Api.is_active == True
-                )
-            )
-        )
-        apis = apis_result.scalars().all()
-        for api in apis:
-            if api.file_id not in apis_dict:
-                apis_dict[api.file_id] = []
-            apis_dict[api.file_id].append(api)
-            total_apis += 1
-            total_test_cases += len(api.cases) if api.cases else 0
-
-        # Build file tree
-        file_tree = build_file_tree(workspace.nodes, True, apis_dict) if workspace.nodes else []
-
-        data = {
-            "id": workspace.id,
-            "name": workspace.name,
-            "description": workspace.description,
-            "created_at": workspace.created_at,
-            "file_tree": file_tree,
-            "total_nodes": len(workspace.nodes) if workspace.nodes else 0,
-            "include_apis": True,
-            "total_apis": total_apis,
-            "total_test_cases": total_test_cases
-        }
-        return create_response(200, value_correction(data))
+    # Patch the new subtree into the cached tree (or build the tree if it isn't cached)
+    await graft_workspace_tree(db, request.target_workspace_id, request.target_folder_id, copied_node_id)
+    data = await load_workspace_tree(db, request.target_workspace_id)
+    if not data:
+        return create_response(206, error_message="Workspace not found after copy.")
+    return create_response(200, data)
 
-    except Exception as e:
-        logger.error(f"Error copying node {node_id}: {str(e)}")
-        await db.rollback()
-        ExceptionHandler(e)
@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, Header
-from sqlalchemy import select, and_
+from sqlalchemy import insert, select, and_, exists
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from config import (
     get_db,
-    get_user_by_username,
+    get_user_id_by_username,
+    invalidate_workspace_tree,
+    lock_sibling_names,
     validate_parent_node,
     verify_workspace_ownership
 )
@@ -13,9 +15,7 @@ from schema import (
     NodeCreateRequest
 )
 from utils import (
-    ExceptionHandler,
-    create_response,
-    value_correction
+    create_response
 )
 
 router = APIRouter()
@@ -28,55 +28,56 @@ async def create_node(
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new folder or file node"""
-    try:
-        # Get user
-        user = await get_user_by_username(db, username)
-        if not user:
-            return create_response(400, error_message="User not found")
+    # Get user id (cached in-process)
+    user_id = await get_user_id_by_username(db, username)
+    if not user_id:
+        return create_response(400, error_message="User not found")
 
-        # Verify workspace ownership
-        if not await verify_workspace_ownership(db, node_data.workspace_id, user.id):
-            return create_response(403, error_message="Workspace access denied")
+    # Verify workspace ownership
+    if not await verify_workspace_ownership(db, node_data.workspace_id, user_id):
+        return create_response(403, error_message="Workspace access denied")
 
-        # Validate parent node if provided
-        if node_data.parent_id and not await validate_parent_node(db, node_data.parent_id, node_data.workspace_id):
-            return create_response(400, error_message="Invalid parent node or parent is not a folder")
+    # Validate parent node if provided
+    if node_data.parent_id and not await validate_parent_node(db, node_data.parent_id, node_data.workspace_id):
+        return create_response(400, error_message="Invalid parent node or parent is not a folder")
 
-        # Check for duplicate names in the same parent
-        existing_query = select(Node).where(
+    # Check for duplicate names in the same parent; the sibling-name lock is held until commit
+    # so a concurrent create cannot take the name in between
+    await lock_sibling_names(db, node_data.workspace_id, node_data.parent_id)
+    existing_query = select(
+        exists().where(
             and_(
                 Node.workspace_id == node_data.workspace_id,
                 Node.name == node_data.name,
                 Node.parent_id == node_data.parent_id
             )
         )
-        existing_result = await db.execute(existing_query)
-        if existing_result.scalar_one_or_none():
-            return create_response(400, error_message="A node with this name already exists in this location")
+    )
+    if (await db.execute(existing_query)).scalar():
+        return create_response(400, error_message="A node with this name already exists in this location")
 
-        # Create new node
-        new_node = Node(
+    # Create new node; RETURNING hands back the generated id and created_at without a refresh
+    new_node = (await db.execute(
+        insert(Node)
+        .values(
             workspace_id=node_data.workspace_id,
             name=node_data.name,
             type=node_data.type,
             parent_id=node_data.parent_id
         )
+        .returning(Node.id, Node.created_at)
+    )).one()
+    await db.commit()
+    invalidate_workspace_tree(node_data.workspace_id)
+    data = {
+        "id": new_node.id,
+        "workspace_id": node_data.workspace_id,
+        "name": node_data.name.strip(),
+        "type": node_data.type,
+        "parent_id": node_data.parent_id,
+        "created_at": str(new_node.created_at),
+        "children": []
+    }
 
-        db.add(new_node)
-        await db.commit()
-        await db.refresh(new_node)
-        data = {
-            "id": new_node.id,
-            "workspace_id": new_node.workspace_id,
-            "name": new_node.name,
-            "type": new_node.type,
-            "parent_id": new_node.parent_id,
-            "created_at": str(new_node.created_at),
-            "children": []
-        }
-
-        return create_response(201, value_correction(data))
-    except Exception as e:
-        await db.rollback()
-        ExceptionHandler(e)
+    return create_response(201, data)
 
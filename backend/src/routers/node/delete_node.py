@@ -1,23 +1,66 @@
 from fastapi import APIRouter, Depends, Header
-from sqlalchemy import select, and_
+from sqlalchemy import and_, bindparam, delete, exists, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
 from config import (
     get_db,
-    get_user_by_username,
-    verify_node_ownership
+    invalidate_headers_cache
 )
-from models import Node, Api, ApiCase, Workspace
-from routers.workspace.list_workspace_tree import build_file_tree
+from models import Node, Api, ApiCase, User, Workspace
+from routers.workspace.list_workspace_tree import load_workspace_tree, prune_workspace_tree
 from utils import (
-    ExceptionHandler,
-    create_response,
-    value_correction
+    create_response
 )
 
 router = APIRouter()
 
+# The caller's user row and the node, if it sits in one of their workspaces
+delete_target = (
+    select(User.id.label("user_id"), Node.id.label("node_id"), Node.type, Node.workspace_id)
+    .select_from(User)
+    .outerjoin(
+        Node,
+        and_(
+            Node.id == bindparam("node_id"),
+            exists().where(Workspace.id == Node.workspace_id, Workspace.user_id == User.id)
+        )
+    )
+    .where(User.email == bindparam("username"))
+    .limit(1)
+    .cte("delete_target")
+)
+# The ON DELETE CASCADE foreign keys remove descendants, APIs, cases and headers
+deleted_node = (
+    delete(Node.__table__)
+    .where(Node.__table__.c.id == select(delete_target.c.node_id).scalar_subquery())
+    .returning(Node.__table__.c.id)
+    .cte("deleted_node")
+)
+# Authorize, delete and report what went with the node in one statement. Every part of it reads
+# the snapshot from before the delete, so the child and case counts are the pre-delete ones
+DELETE_NODE_QUERY = (
+    select(
+        delete_target.c.user_id,
+        delete_target.c.node_id,
+        delete_target.c.type,
+        delete_target.c.workspace_id,
+        Api.id.label("api_id"),
+        select(func.count(Node.id))
+        .where(Node.parent_id == delete_target.c.node_id)
+        .scalar_subquery()
+        .label("children_count"),
+        select(func.count(ApiCase.id))
+        .where(ApiCase.api_id == Api.id)
+        .correlate(Api)
+        .scalar_subquery()
+        .label("case_count"),
+        select(func.count()).select_from(deleted_node).scalar_subquery().label("deleted_count")
+    )
+    .select_from(delete_target)
+    .outerjoin(Api, Api.file_id == delete_target.c.node_id)
+    .limit(1)
+)
+
 
 @router.delete("/{node_id}")
 async def delete_node(
@@ -26,109 +69,40 @@ async def delete_node(
     db: AsyncSession = Depends(get_db)
 ):
     """Delete a node and all its children, and return the updated workspace tree."""
-    try:
-        # Get user
-        user = await get_user_by_username(db, username)
-        if not user:
-            return create_response(400, error_message="User not found")
-
-        # Verify node ownership
-        node = await verify_node_ownership(db, node_id, user.id)
-        if not node:
-            return create_response(206, error_message="Node not found or access denied")
-
-        # Count children before deletion (for info)
-        children_result = await db.execute(
-            select(Node).where(Node.parent_id == node_id)
-        )
-        children_count = len(children_result.scalars().all())
-
-        # If this is a file, check for associated APIs and delete them first
-        api_count = 0
-        case_count = 0
-        if node.type == "file":
-            # Get APIs associated with this file
-            api_result = await db.execute(
-                select(Api).where(Api.file_id == node_id)
-            )
-            api = api_result.scalar_one_or_none()
-
-            # If an API exists, get its cases and delete them
-            if api:
-                # Count cases for information
-                case_result = await db.execute(
-                    select(ApiCase).where(ApiCase.api_id == api.id)
-                )
-                cases = case_result.scalars().all()
-                case_count = len(cases)
-
-                # Delete the API (cascade will handle the cases)
-                await db.delete(api)
-                api_count = 1
-
-        # Now delete the node (cascade will handle children)
-        await db.delete(node)
-        await db.commit()
-
-        message = f"{node.type.title()} deleted successfully"
-        if children_count > 0:
-            message += f" (including {children_count} child items)"
-        if api_count > 0:
-            message += f", {api_count} API"
-            if case_count > 0:
-                message += f" with {case_count} test cases"
-
-        # Fetch the updated workspace and nodes
-        result = await db.execute(
-            select(Workspace)
-            .options(selectinload(Workspace.nodes))
-            .where(Workspace.id == node.workspace_id)
-        )
-        workspace = result.scalar_one_or_none()
-        if not workspace:
-            return create_response(206, error_message="Workspace not found after delete.")
-
-        apis_dict = {}
-        total_apis = 0
-        total_test_cases = 0
-
-        # Fetch all APIs with test cases for this workspace
-        apis_result = await db.execute(
-            select(Api)
-            .join(Node, Api.file_id == Node.id)
-            .options(selectinload(Api.cases))
-            .where(
-                and_(
-                    Node.workspace_id == node.workspace_id,
-                    Api.is_active == True
-                )
-            )
-        )
-        apis = apis_result.scalars().all()
-        for api in apis:
-            if api.file_id not in apis_dict:
-                apis_dict[api.file_id] = []
-            apis_dict[api.file_id].append(api)
-            total_apis += 1
-            total_test_cases += len(api.cases) if api.cases else 0
-
-        # Build file tree
-        file_tree = build_file_tree(workspace.nodes, True, apis_dict) if workspace.nodes else []
-
-        data = {
-            "id": workspace.id,
-            "name": workspace.name,
-            "description": workspace.description,
-            "created_at": workspace.created_at,
-            "file_tree": file_tree,
-            "total_nodes": len(workspace.nodes) if workspace.nodes else 0,
-            "include_apis": True,
-            "total_apis": total_apis,
-            "total_test_cases": total_test_cases
-        }
-        return create_response(200, value_correction(data), message=message)
+    # User lookup, ownership check, the delete itself and the counts for the message in one round trip
+    result = await db.execute(DELETE_NODE_QUERY, {"username": username, "node_id": node_id})
+    row = result.first()
+    if not row:
+        return create_response(400, error_message="User not found")
+
+    if row.node_id is None:
+        return create_response(206, error_message="Node not found or access denied")
+
+    await db.commit()
+    invalidate_headers_cache(node_id)
+
+    children_count = row.children_count
+
+    # The file's API (if any) and its case count came back with the delete
+    api_count = 0
+    case_count = 0
+    if row.type == "file" and row.api_id is not None:
+        case_count = row.case_count
+        api_count = 1
+
+    message = f"{row.type.title()} deleted successfully"
+    if children_count > 0:
+        message += f" (including {children_count} child items)"
+    if api_count > 0:
+        message += f", {api_count} API"
+        if case_count > 0:
+            message += f" with {case_count} test cases"
+
+    # Drop the deleted subtree from the cached tree (or build the tree if it isn't cached)
+    prune_workspace_tree(row.workspace_id, node_id)
+    data = await load_workspace_tree(db, row.workspace_id)
+    if not data:
+        return create_response(206, error_message="Workspace not found after delete.")
+    return create_response(200, data, message=message)
 
-    except Exception as e:
-        await db.rollback()
-        ExceptionHandler(e)
 
@@ -6,13 +6,11 @@ from sqlalchemy.orm import selectinload
 from config import (
     get_db,
     get_node_path,
-    get_user_by_username
+    get_user_id_by_username
 )
 from models import Workspace, Node
 from utils import (
-    ExceptionHandler,
-    create_response,
-    value_correction
+    create_response
 )
 
 router = APIRouter()
@@ -24,59 +22,57 @@ async def get_node_with_children(
     db: AsyncSession = Depends(get_db)
 ):
     """Get node details with its direct children and breadcrumb path"""
-    try:
-        # Get user
-        user = await get_user_by_username(db, username)
-        if not user:
-            return create_response(400, error_message="User not found")
+    # Get user id (cached in-process)
+    user_id = await get_user_id_by_username(db, username)
+    if not user_id:
+        return create_response(400, error_message="User not found")
 
-        # Verify node ownership and get node with children
-        result = await db.execute(
-            select(Node)
-            .options(selectinload(Node.children))
-            .join(Workspace, Node.workspace_id == Workspace.id)
-            .where(
-                and_(
-                    Node.id == node_id,
-                    Workspace.user_id == user.id
-                )
+    # Verify node ownership and get node with children
+    result = await db.execute(
+        select(Node)
+        .options(selectinload(Node.children))
+        .join(Workspace, Node.workspace_id == Workspace.id)
+        .where(
+            and_(
+                Node.id == node_id,
+                Workspace.user_id == user_id
             )
         )
-        node = result.scalar_one_or_none()
+    )
+    node = result.scalar_one_or_none()
 
-        if not node:
-            return create_response(206, error_message="Node not found or access denied")
+    if not node:
+        return create_response(206, error_message="Node not found or access denied")
 
-        # Get breadcrumb path
-        path = await get_node_path(db, node_id)
+    # Get breadcrumb path
+    path = await get_node_path(db, node_id)
 
-        # Prepare children data
-        children = []
-        if hasattr(node, 'children') and node.children:
-            for child in node.children:
-                children.append({
-                    "id": child.id,
-                    "workspace_id": child.workspace_id,
-                    "name": child.name,
-                    "type": child.type,
-                    "parent_id": child.parent_id,
-                    "created_at": child.created_at
-                })
-
-        data = {
-            "id": node.id,
-            "workspace_id": node.workspace_id,
-            "name": node.name,
-            "type": node.type,
-            "parent_id": node.parent_id,
-            "created_at": node.created_at,
-            "path": path,
-            "children": children,
-            "children_count": len(children)
+    # Prepare children data; names are stripped here and timestamps are formatted by the
+    # response encoder, so the payload skips the value_correction walk
+    children = [
+        {
+            "id": child.id,
+            "workspace_id": child.workspace_id,
+            "name": child.name.strip(),
+            "type": child.type,
+            "parent_id": child.parent_id,
+            "created_at": child.created_at
         }
+        for child in node.children
+    ]
+
+    data = {
+        "id": node.id,
+        "workspace_id": node.workspace_id,
+        "name": node.name.strip(),
+        "type": node.type,
+        "parent_id": node.parent_id,
+        "created_at": node.created_at,
+        "path": [{**entry, "name": entry["name"].strip()} for entry in path],
+        "children": children,
+        "children_count": len(children)
+    }
 
-        return create_response(200, value_correction(data))
+    return create_response(200, data)
 
-    except Exception as e:
-        ExceptionHandler(e)
 
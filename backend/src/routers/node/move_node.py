@@ -1,19 +1,73 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
-from models import Node, Workspace, Api
-from config import get_db
+from sqlalchemy import delete, exists, update
+from sqlalchemy.orm import aliased
+from typing import Optional
+from models import Api, Node, NodeClosure
+from config import get_db, invalidate_headers_cache
 from schema import NodeCopyRequest
-import logging
-from sqlalchemy.orm import selectinload
-from sqlalchemy import and_
 
-from utils import ExceptionHandler, create_response, get_unique_name, value_correction
-from routers.node.copy_node import copy_node_recursive
-from routers.workspace.list_workspace_tree import build_file_tree
+from utils import create_response, get_unique_name
+from routers.node.copy_node import copy_node_subtree, copy_target_error, fetch_copy_source
+from routers.workspace.list_workspace_tree import graft_workspace_tree, load_workspace_tree, prune_workspace_tree
 
 router = APIRouter()
-logger = logging.getLogger(__name__)
+
+
+async def reparent_node(
+    db: AsyncSession,
+    node_id: int,
+    target_workspace_id: int,
+    target_folder_id: Optional[int],
+    new_name: str
+):
+    """
+    Move a node within its workspace with one UPDATE whose WHERE clause carries every guard:
+    the node is in the target workspace, the target is a folder of that workspace (or the root),
+    and the target is not inside the node's own subtree. Returns the node's type, or None when a
+    guard failed and nothing was changed. The node_closure trigger moves the subtree. A file's API
+    takes the new name too, as it does when the node is copied.
+    """
+    guards = [Node.id == node_id, Node.workspace_id == target_workspace_id]
+    if target_folder_id is not None:
+        target_folder = aliased(Node)
+        guards.append(exists().where(
+            target_folder.id == target_folder_id,
+            target_folder.type == "folder",
+            target_folder.workspace_id == target_workspace_id
+        ))
+        guards.append(~exists().where(
+            NodeClosure.ancestor_id == node_id,
+            NodeClosure.descendant_id == target_folder_id
+        ))
+    result = await db.execute(
+        update(Node)
+        .where(*guards)
+        .values(parent_id=target_folder_id, name=new_name)
+        .returning(Node.type)
+        .execution_options(synchronize_session=False)
+    )
+    node_type = result.scalar_one_or_none()
+    if node_type == "file":
+        await db.execute(
+            update(Api)
+            .where(Api.file_id == node_id, Api.name != new_name)
+            .values(name=new_name)
+            .execution_options(synchronize_session=False)
+        )
+    return node_type
+
+
+def move_target_error(source, request: NodeCopyRequest):
+    """copy_target_error plus the move-only guard against moving a folder into its own subtree"""
+    error = copy_target_error(source, request)
+    if error:
+        return error
+    # A node can't move into itself or its own subtree; the closure table answers that directly
+    if request.target_folder_id and source.into_own_subtree:
+        return create_response(400, error_message="Cannot move a folder into itself or its descendants")
+    return None
+
 
 @router.post("/{node_id}/move")
 async def move_node(
@@ -22,89 +76,88 @@ async def move_node(
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Move a node (file or folder) to a different location by copy-then-delete.
+    Move a node (file or folder) to a different location: re-parented in place within a
+    workspace, copied then deleted across workspaces.
     Returns the full workspace tree structure (like list_workspace_tree).
     """
-    try:
-        # 1. Get the node to move
-        result = await db.execute(select(Node).where(Node.id == node_id))
-        source_node = result.scalar_one_or_none()
-        if not source_node:
-            return create_response(206, error_message="Node not found")
-
-        # 2. Generate a unique name in the target location
+    source_workspace_id = request.target_workspace_id
+    unique_name = None
+    node_type = None
+
+    # 1. Common case first: a named move within the workspace is the guarded UPDATE alone. The
+    # node is excluded from the sibling names so it doesn't conflict with itself
+    if request.new_name:
         unique_name = await get_unique_name(
-            request.new_name or source_node.name,
+            request.new_name,
             request.target_workspace_id,
             request.target_folder_id,
-            db
+            db,
+            exclude_node_id=node_id
         )
-
-        # 3. Copy the node (reuse your copy_node logic)
-        copied_node = await copy_node_recursive(
-            source_node,
-            request.target_workspace_id,
-            request.target_folder_id,
-            unique_name,
-            db
+        node_type = await reparent_node(
+            db, node_id, request.target_workspace_id, request.target_folder_id, unique_name
         )
-        await db.commit()
 
-        # 4. Delete the original node (and children if folder)
-        await db.execute(delete(Node).where(Node.id == node_id))
-        await db.commit()
+    if node_type is None:
+        # 2. The node and the target checks in one round trip (shared with copy_node); tells a
+        # cross-workspace move from a failed guard
+        source_node = await fetch_copy_source(db, node_id, request)
+        error = move_target_error(source_node, request)
+        if error:
+            return error
 
-        # 5. Fetch the updated workspace and nodes
-        result = await db.execute(
-            select(Workspace)
-            .options(selectinload(Workspace.nodes))
-            .where(Workspace.id == request.target_workspace_id)
-        )
-        workspace = result.scalar_one_or_none()
-        if not workspace:
-            return create_response(206, error_message="Workspace not found after move.")
-
-        apis_dict = {}
-        total_apis = 0
-        total_test_cases = 0
-
-        # Fetch all APIs with test cases for this workspace
-        apis_result = await db.execute(
-            select(Api)
-            .join(Node, Api.file_id == Node.id)
-            .options(selectinload(Api.cases))
-            .where(
-                and_(
-                    Node.workspace_id == request.target_workspace_id,
-                    Api.is_active == True
-                )
+        source_workspace_id = source_node.workspace_id
+        node_type = source_node.type
+
+        # 3. Generate a unique name in the target location (unless the fast path already did)
+        if unique_name is None:
+            unique_name = await get_unique_name(
+                source_node.name,
+                request.target_workspace_id,
+                request.target_folder_id,
+                db,
+                exclude_node_id=node_id
             )
-        )
-        apis = apis_result.scalars().all()
-        for api in apis:
-            if api.file_id not in apis_dict:
-                apis_dict[api.file_id] = []
-            apis_dict[api.file_id].append(api)
-            total_apis += 1
-            total_test_cases += len(api.cases) if api.cases else 0
-
-        # Build file tree
-        file_tree = build_file_tree(workspace.nodes, True, apis_dict) if workspace.nodes else []
-
-        data = {
-            "id": workspace.id,
-            "name": workspace.name,
-            "description": workspace.description,
-            "created_at": workspace.created_at,
-            "file_tree": file_tree,
-            "total_nodes": len(workspace.nodes) if workspace.nodes else 0,
-            "include_apis": True,
-            "total_apis": total_apis,
-            "total_test_cases": total_test_cases
-        }
-        message = f"{source_node.type.title()} moved successfully"
-        return create_response(200, value_correction(data), message=message)
-
-    except Exception as e:
-        await db.rollback()
-        ExceptionHandler(e)
+
+        if source_workspace_id == request.target_workspace_id:
+            # 4. Unnamed move within the workspace: the same guarded UPDATE. It only misses when the
+            # node or target changed since the preflight; nothing was written, so report it from a
+            # fresh preflight instead of committing
+            moved_type = await reparent_node(
+                db, node_id, request.target_workspace_id, request.target_folder_id, unique_name
+            )
+            if moved_type is None:
+                await db.rollback()
+                source_node = await fetch_copy_source(db, node_id, request)
+                return move_target_error(source_node, request) or create_response(206, error_message="Node not found")
+            moved_node_id = node_id
+        else:
+            # 4. Across workspaces, copy the subtree into the target (reuse the copy_node logic)...
+            moved_node_id = await copy_node_subtree(
+                node_id,
+                request.target_workspace_id,
+                request.target_folder_id,
+                unique_name,
+                db
+            )
+
+            # ...and delete the original node (and children if folder); copy and delete commit
+            # together, so a failure leaves neither half behind
+            await db.execute(delete(Node).where(Node.id == node_id).execution_options(synchronize_session=False))
+    else:
+        moved_node_id = node_id
+
+    await db.commit()
+    invalidate_headers_cache(node_id)
+
+    # 5. Patch the cached trees instead of rebuilding them: drop the subtree from its old place
+    # and graft it back in at the target (the tree is built from scratch only if it isn't cached)
+    prune_workspace_tree(source_workspace_id, node_id)
+    await graft_workspace_tree(db, request.target_workspace_id, request.target_folder_id, moved_node_id)
+    data = await load_workspace_tree(db, request.target_workspace_id)
+    if not data:
+        return create_response(206, error_message="Workspace not found after move.")
+
+    message = f"{node_type.title()} moved successfully"
+    return create_response(200, data, message=message)
+
@@ -1,22 +1,21 @@
 from fastapi import APIRouter, Depends, Header
-from sqlalchemy import select, and_
+from sqlalchemy import and_, exists, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
 from config import (
-    check_circular_reference,
     get_db,
-    get_user_by_username,
-    validate_parent_node,
-    verify_node_ownership
+    get_user_id_by_username,
+    invalidate_headers_cache,
+    invalidate_workspace_tree,
+    lock_sibling_names
 )
-from models import Node
+from models import Node, NodeClosure, Workspace
 from schema import (
     NodeUpdateRequest
 )
 from utils import (
-    ExceptionHandler,
-    create_response,
-    value_correction
+    create_response
 )
 
 router = APIRouter()
@@ -29,65 +28,99 @@ async def update_node(
     db: AsyncSession = Depends(get_db)
 ):
     """Update/rename/move a node"""
-    try:
-        # Get user
-        user = await get_user_by_username(db, username)
-        if not user:
-            return create_response(400, error_message="User not found")
+    # Get user id (cached in-process)
+    user_id = await get_user_id_by_username(db, username)
+    if not user_id:
+        return create_response(400, error_message="User not found")
 
-        # Verify node ownership
-        node = await verify_node_ownership(db, node_id, user.id)
-        if not node:
-            return create_response(206, error_message="Node not found or access denied")
-
-        # If moving the node, validate the new parent
-        if node_data.parent_id is not None:
-            # Check for circular reference
-            if await check_circular_reference(db, node_id, node_data.parent_id):
-                return create_response(400, error_message="Cannot move node: would create circular reference")
+    # Node ownership, the new parent's validity and the circular-move check in one round trip;
+    # the checks are only consulted when the request moves the node
+    new_parent = aliased(Node)
+    result = await db.execute(
+        select(
+            Node,
+            new_parent.id.label("new_parent_id"),
+            exists().where(
+                NodeClosure.ancestor_id == Node.id,
+                NodeClosure.descendant_id == node_data.parent_id
+            ).label("circular")
+        )
+        .join(Workspace, Node.workspace_id == Workspace.id)
+        .outerjoin(
+            new_parent,
+            and_(
+                new_parent.id == node_data.parent_id,
+                new_parent.workspace_id == Node.workspace_id,
+                new_parent.type == "folder"
+            )
+        )
+        .where(Node.id == node_id, Workspace.user_id == user_id)
+    )
+    row = result.first()
+    if not row:
+        return create_response(206, error_message="Node not found or access denied")
+    node = row.Node
 
-            # Validate parent node
-            if not await validate_parent_node(db, node_data.parent_id, node.workspace_id):
-                return create_response(400, error_message="Invalid parent node or parent is not a folder")
+    # Only fields that actually change count; a rename to the current name or a move to the
+    # current parent is a no-op and skips the checks and the UPDATE
+    values = {}
+    if node_data.name and node_data.name != node.name:
+        values["name"] = node_data.name
+    if node_data.parent_id is not None and node_data.parent_id != node.parent_id:
+        values["parent_id"] = node_data.parent_id
 
-        # Check for name conflicts if renaming or moving
-        if node_data.name or node_data.parent_id is not None:
-            new_name = node_data.name if node_data.name else node.name
-            new_parent_id = node_data.parent_id if node_data.parent_id is not None else node.parent_id
+    # If moving the node, validate the new parent
+    if "parent_id" in values:
+        # Check for circular reference
+        if row.circular:
+            return create_response(400, error_message="Cannot move node: would create circular reference")
 
-            existing_query = select(Node).where(
-                and_(
-                    Node.workspace_id == node.workspace_id,
-                    Node.name == new_name,
-                    Node.parent_id == new_parent_id,
-                    Node.id != node_id  # Exclude current node
-                )
-            )
-            existing_result = await db.execute(existing_query)
-            if existing_result.scalar_one_or_none():
-                return create_response(400, error_message="A node with this name already exists in the target location")
+        # Validate parent node
+        if row.new_parent_id is None:
+            return create_response(400, error_message="Invalid parent node or parent is not a folder")
 
-        # Update node fields
-        if node_data.name:
-            node.name = node_data.name
-        if node_data.parent_id is not None:
-            node.parent_id = node_data.parent_id
+    # Check for name conflicts if renaming or moving. The sibling-name lock makes the check and the
+    # UPDATE atomic against concurrent creates, copies and renames into the same folder
+    if values:
+        new_name = values.get("name", node.name)
+        new_parent_id = values.get("parent_id", node.parent_id)
+        await lock_sibling_names(db, node.workspace_id, new_parent_id)
+        name_taken = await db.scalar(
+            select(exists().where(
+                Node.workspace_id == node.workspace_id,
+                Node.name == new_name,
+                Node.parent_id.is_not_distinct_from(new_parent_id),
+                Node.id != node_id  # Exclude current node
+            ))
+        )
+        if name_taken:
+            return create_response(400, error_message="A node with this name already exists in the target location")
 
+    # Update node fields; RETURNING hands back the updated row, so no refresh query is needed
+    updated = node
+    if values:
+        result = await db.execute(
+            update(Node)
+            .where(Node.id == node_id)
+            .values(**values)
+            .returning(Node.id, Node.workspace_id, Node.name, Node.type, Node.parent_id, Node.created_at)
+            .execution_options(synchronize_session=False)
+        )
+        updated = result.one()
         await db.commit()
-        await db.refresh(node)
-        data = {
-            "id": node.id,
-            "workspace_id": node.workspace_id,
-            "name": node.name,
-            "type": node.type,
-            "parent_id": node.parent_id,
-            "created_at": str(node.created_at),
-            "children": []
-        }
+        invalidate_workspace_tree(updated.workspace_id)
+        invalidate_headers_cache(node_id)
+
+    data = {
+        "id": updated.id,
+        "workspace_id": updated.workspace_id,
+        "name": updated.name.strip(),
+        "type": updated.type,
+        "parent_id": updated.parent_id,
+        "created_at": str(updated.created_at),
+        "children": []
+    }
 
-        return create_response(200, value_correction(data))
+    return create_response(200, data)
 
-    except Exception as e:
-        await db.rollback()
-        ExceptionHandler(e)
 
@@ -1,11 +1,11 @@
 from typing import Optional
 from fastapi import APIRouter, Depends, Header
 from pydantic import BaseModel
-import re
 import json
 
 from runner import run_from_list_api
 from utils import (
+    ENV_VARIABLE_NAME_PATTERN,
     ExceptionHandler,
     create_response
 )
@@ -30,12 +30,16 @@ def resolve_variables_in_text(text: str, variables: dict) -> str:
     if not text or not variables:
         return text
 
+    text = str(text)
+    if '{{' not in text:
+        return text
+
+    get_variable = variables.get
+
     def replace_variable(match):
-        var_name = match.group(1)
-        return str(variables.get(var_name, match.group(0)))  # Keep original if not found
+        return str(get_variable(match.group(1), match.group(0)))  # Keep original if not found
 
-    pattern = r'\{\{([a-zA-Z_][a-zA-Z0-9_\-]*)\}\}'
-    return re.sub(pattern, replace_variable, str(text))
+    return ENV_VARIABLE_NAME_PATTERN.sub(replace_variable, text)
 
 
 def resolve_variables_in_dict(data: dict, variables: dict) -> dict:
@@ -89,12 +93,11 @@ async def get_workspace_variables(db: AsyncSession, workspace_id: int) -> dict:
             return {}
 
         # Get all enabled variables with actual values (including secrets for execution)
-        variables_dict = {}
-        for key, var_data in active_environment.variables.items():
-            if var_data is not None:
-                variables_dict[key] = var_data
-
-        return variables_dict
+        return {
+            key: var_data
+            for key, var_data in active_environment.variables.items()
+            if var_data is not None
+        }
     except Exception as e:
         return {}
 
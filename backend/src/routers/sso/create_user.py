@@ -29,7 +29,7 @@ async def sign_up(user_data: UserSignUp, db: AsyncSession = Depends(get_db)):
             return create_response(400, error_message ="Email already registered")
 
         # Create new user
-        hashed_password = get_password_hash(user_data.password)
+        hashed_password = await get_password_hash(user_data.password)
         new_user = User(
             username=user_data.email,
             email=user_data.email,
@@ -3,7 +3,8 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from config import (
-    get_db
+    get_db,
+    invalidate_user_cache
 )
 from models import User
 from utils import (
@@ -30,6 +31,7 @@ async def delete_user(
         await blacklist_token(username)
         user.is_active = False
         await db.commit()
+        invalidate_user_cache(username)
 
         return create_response(200 , error_message= "User account successfully deleted")
     except Exception as e:
@@ -86,11 +86,11 @@ async def change_password(
             await log_failed_attempt(db, username)
             return create_response(206, error_message="User account is not active")
 
-        if not verify_password(request.old_password, _user.password):
+        if not await verify_password(request.old_password, _user.password):
             await log_failed_attempt(db, username)
             return create_response(400, error_message="old password is incorrect")
 
-        _user.password = get_password_hash(request.new_password)
+        _user.password = await get_password_hash(request.new_password)
 
         # blacklist the current token for this user (keep as-is; if async, add await)
         await blacklist_token(username)
@@ -126,7 +126,7 @@ async def forgot_password(
             await log_failed_attempt(db, user_name)
             return create_response(206, "User account is not active")
 
-        _user.password = get_password_hash(request.new_password)
+        _user.password = await get_password_hash(request.new_password)
 
         await blacklist_token(user_name)
 
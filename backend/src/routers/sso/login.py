@@ -33,7 +33,7 @@ async def sign_in(user_credentials: UserSignIn, db: AsyncSession = Depends(get_d
         user = result.scalar_one_or_none()
 
         # Verify user exists and password is correct
-        if not user or not verify_password(user_credentials.password, user.password):
+        if not user or not await verify_password(user_credentials.password, user.password):
             await log_failed_attempt(db, user_credentials.email)
             return create_response(401, error_message = "Incorrect username or password")
 
@@ -89,7 +89,7 @@ async def generate_otp_req(
         email_sent = True
 
         if not email_sent:
-            logs(f"Failed to send OTP to {request.email}", type="warning")
+            logs("Failed to send OTP to %s", request.email, type="warning")
 
         await db.commit()
 
@@ -100,7 +100,7 @@ async def generate_otp_req(
         )
 
     except Exception as e:
-        logs(f"Error in forget password: {e}", type="error")
+        logs("Error in forget password: %s", e, type="error")
         await db.rollback()
         ExceptionHandler(e)
 
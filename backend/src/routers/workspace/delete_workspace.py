@@ -2,10 +2,15 @@ from fastapi import APIRouter, Depends, Header
 from sqlalchemy import select, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from config import get_db, get_user_by_username
+from config import (
+    get_db,
+    get_user_by_username,
+    invalidate_env_cache,
+    invalidate_workspace_ownership,
+    invalidate_workspace_tree
+)
 from models import Workspace
 from utils import (
-    ExceptionHandler,
     create_response
 )
 
@@ -19,32 +24,30 @@ async def delete_workspace(
     db: AsyncSession = Depends(get_db)
 ):
     """Delete workspace and all its contents"""
-    try:
-        # Get user
-        user = await get_user_by_username(db, username)
-        if not user:
-            return create_response(400, error_message="User not found")
-
-        # Get workspace
-        result = await db.execute(
-            select(Workspace).where(
-                and_(
-                    Workspace.id == workspace_id,
-                    Workspace.user_id == user.id
-                )
+    # Get user
+    user = await get_user_by_username(db, username)
+    if not user:
+        return create_response(400, error_message="User not found")
+
+    # Get workspace
+    result = await db.execute(
+        select(Workspace).where(
+            and_(
+                Workspace.id == workspace_id,
+                Workspace.user_id == user.id
             )
         )
-        workspace = result.scalar_one_or_none()
-
-        if not workspace:
-            return create_response(206, error_message="Workspace not found or access denied")
+    )
+    workspace = result.scalar_one_or_none()
 
-        # Delete workspace (cascade will handle related data)
-        await db.delete(workspace)
-        await db.commit()
+    if not workspace:
+        return create_response(206, error_message="Workspace not found or access denied")
 
-        return create_response(200, {"message":"Workspace deleted successfully"})
+    # Delete workspace (cascade will handle related data)
+    await db.delete(workspace)
+    await db.commit()
+    invalidate_workspace_tree(workspace_id)
+    invalidate_env_cache(workspace_id)
+    invalidate_workspace_ownership(workspace_id)
 
-    except Exception as e:
-        await db.rollback()
-        ExceptionHandler(e)
\ No newline at end of file
+    return create_response(200, {"message":"Workspace deleted successfully"})
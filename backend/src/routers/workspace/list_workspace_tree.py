@@ -1,13 +1,23 @@
+import asyncio
 from fastapi import APIRouter, Depends, Header, Query
-from sqlalchemy import select, and_
+from collections import defaultdict
+from sqlalchemy import JSON, Row, and_, func, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
 
-from config import get_db, get_user_by_username
-from models import Workspace, Node, Api
+from config import (
+    SessionLocal,
+    bump_workspace_tree_generation,
+    get_db,
+    get_user_by_username,
+    invalidate_workspace_tree,
+    workspace_tree_cache,
+    workspace_tree_generation
+)
+from models import Workspace, Node, NodeClosure, Api, ApiCase
 from utils import (
-    ExceptionHandler,
     create_response,
     value_correction
 )
@@ -15,59 +25,317 @@ from utils import (
 router = APIRouter()
 
 
+# Columns build_file_tree reads; nodes are loaded as plain rows rather than ORM instances
+TREE_NODE_COLUMNS = (Node.id, Node.parent_id, Node.name, Node.type, Node.created_at)
+
+
+async def fetch_tree_nodes(db: AsyncSession, *filters) -> List[Row]:
+    """Node rows (TREE_NODE_COLUMNS) matching the filters, in id order"""
+    result = await db.execute(select(*TREE_NODE_COLUMNS).where(*filters).order_by(Node.id))
+    return result.all()
+
+
+async def fetch_tree_nodes_own_session(*filters) -> List[Row]:
+    """
+    fetch_tree_nodes on a sibling session, so it can run concurrently with the workspace
+    lookup on the request's session. Only sees committed data.
+    """
+    async with SessionLocal() as session:
+        return await fetch_tree_nodes(session, *filters)
+
+
+def _is_folder(entry: dict) -> bool:
+    return entry["type"] == "folder"
+
+
+def _format_timestamp(value: Optional[datetime]) -> Optional[str]:
+    return value.strftime("%Y-%m-%d %H:%M:%S") if value is not None else None
+
+
 # Helper function to build file tree with APIs and test cases
-def build_file_tree(nodes: List[Node], include_apis: bool = False, apis_dict: Optional[dict] = None) -> List[dict]:
-    """Build hierarchical file tree from flat node list, optionally including APIs and test cases"""
-    node_dict = {node.id: {
-        "id": node.id,
-        "name": node.name,
-        "type": node.type,
-        "method": None,
-        "parent_id": node.parent_id,
-        "created_at": node.created_at,
-        "children": []
-    } for node in nodes}
-
-    # Add APIs as children to their respective file nodes if requested
-    if include_apis and apis_dict:
-        for node_data in node_dict.values():
-            if node_data["type"] == "file":
-                file_apis = apis_dict.get(node_data["id"], [])
-                for api in file_apis:
-                    node_data["method"] = api.method
-                    if api.cases:
-                        for case in api.cases:
-                            node_data["children"].append(
-                                {
-                                    "id": case.id,
-                                    "name": case.name,
-                                    "created_at": case.created_at.strftime("%Y-%m-%d %H:%M:%S")
-                                }
-                            )
-
-    root_nodes = []
-    for node_data in node_dict.values():
-        if node_data["parent_id"] is None:
-            root_nodes.append(node_data)
-        else:
-            parent = node_dict.get(node_data["parent_id"])
-            if parent:
-                parent["children"].append(node_data)
-
-    # Sort children: files first, then folders, for every node recursively
-    def sort_children(node):
-        if node["children"]:
-            # Only sort children that have a 'type' key (i.e., nodes, not API cases)
-            node_children_with_type = [c for c in node["children"] if "type" in c]
-            node_children_without_type = [c for c in node["children"] if "type" not in c]
-            node_children_with_type.sort(key=lambda x: x["type"] == "folder")
-            node["children"] = node_children_with_type + node_children_without_type
-            for child in node_children_with_type:
-                sort_children(child)
-    for root in root_nodes:
-        sort_children(root)
-
-    return root_nodes
+def build_file_tree(
+    nodes: Sequence[Any],
+    include_apis: bool = False,
+    apis_dict: Optional[dict] = None,
+    root_parent_id: Optional[int] = None
+) -> List[dict]:
+    """
+    Build hierarchical file tree from flat node rows (anything with id, parent_id, name, type
+    and created_at), optionally including APIs and test cases.
+    Nodes whose parent_id is root_parent_id become the roots (top-level nodes by default).
+    Values come out the way value_correction would leave them (names stripped, timestamps
+    formatted), so the tree can be serialized without another pass over it.
+    """
+    # One entry per node, bucketed under its parent in a single pass
+    entries = []
+    children_by_parent = defaultdict(list)
+    for node in nodes:
+        entry = {
+            "id": node.id,
+            "name": node.name.strip(),
+            "type": node.type,
+            "method": None,
+            "parent_id": node.parent_id,
+            "created_at": _format_timestamp(node.created_at),
+            "children": []
+        }
+        entries.append(entry)
+        children_by_parent[node.parent_id].append(entry)
+
+    add_apis = include_apis and apis_dict
+    for entry in entries:
+        child_entries = children_by_parent.get(entry["id"])
+        if child_entries:
+            # Files first, then folders; the sort is stable so load order is kept within each group
+            child_entries.sort(key=_is_folder)
+            entry["children"] = child_entries
+
+        # Add APIs' test cases after the node children of their file if requested
+        if add_apis and entry["type"] == "file":
+            for api in apis_dict.get(entry["id"], ()):
+                entry["method"] = api.method.strip()
+                entry["children"].extend(
+                    {
+                        "id": case["id"],
+                        "name": case["name"].strip() if case["name"] else case["name"],
+                        "created_at": case["created_at"]
+                    }
+                    for case in api.cases
+                )
+
+    return children_by_parent.get(root_parent_id, [])
+
+
+def order_tree_children(children: List[dict]) -> List[dict]:
+    """Files first, then folders; API cases (entries without a 'type' key) stay at the end"""
+    # Only sort children that have a 'type' key (i.e., nodes, not API cases)
+    node_children_with_type = [c for c in children if "type" in c]
+    node_children_without_type = [c for c in children if "type" not in c]
+    node_children_with_type.sort(key=lambda x: x["type"] == "folder")
+    return node_children_with_type + node_children_without_type
+
+
+# Tree timestamp format (matches _format_timestamp), applied in SQL for the aggregated cases
+TREE_TIMESTAMP_FORMAT = "YYYY-MM-DD HH24:MI:SS"
+
+
+class TreeApi(NamedTuple):
+    method: str
+    cases: List[dict]  # {"id", "name", "created_at"} with created_at already formatted
+
+
+async def fetch_tree_with_apis(
+    db: AsyncSession,
+    *filters
+) -> Tuple[List[Row], Dict[int, List[TreeApi]], int, int]:
+    """
+    Node rows matching the filters (in id order) with their active APIs grouped by file_id, plus
+    the API and test case totals. Cases are grouped per API in SQL (json_agg with a count), so
+    the query returns one row per node and no ORM objects are built.
+    """
+    cases_by_api = (
+        select(
+            ApiCase.api_id,
+            func.json_agg(
+                aggregate_order_by(
+                    func.json_build_object(
+                        "id", ApiCase.id,
+                        "name", ApiCase.name,
+                        "created_at", func.to_char(ApiCase.created_at, TREE_TIMESTAMP_FORMAT)
+                    ),
+                    ApiCase.id
+                ),
+                type_=JSON
+            ).label("cases"),
+            func.count(ApiCase.id).label("case_count")
+        )
+        .join(Api, ApiCase.api_id == Api.id)
+        .join(Node, Api.file_id == Node.id)
+        .where(Api.is_active == True, *filters)
+        .group_by(ApiCase.api_id)
+        .subquery()
+    )
+    result = await db.execute(
+        select(*TREE_NODE_COLUMNS, Api.method, cases_by_api.c.cases, cases_by_api.c.case_count)
+        .outerjoin(Api, and_(Api.file_id == Node.id, Api.is_active == True))
+        .outerjoin(cases_by_api, cases_by_api.c.api_id == Api.id)
+        .where(*filters)
+        .order_by(Node.id)
+    )
+    nodes = result.all()
+    apis_dict = {}
+    total_test_cases = 0
+    for row in nodes:
+        # apis.file_id is unique, so a file has at most one API
+        if row.method is not None:
+            apis_dict[row.id] = [TreeApi(row.method, row.cases or [])]
+            total_test_cases += row.case_count or 0
+    return nodes, apis_dict, len(apis_dict), total_test_cases
+
+
+async def fetch_tree_with_apis_own_session(*filters) -> Tuple[List[Row], Dict[int, List[TreeApi]], int, int]:
+    """
+    fetch_tree_with_apis on a sibling session, so it can run concurrently with the workspace
+    lookup on the request's session. Only sees committed data.
+    """
+    async with SessionLocal() as session:
+        return await fetch_tree_with_apis(session, *filters)
+
+
+def _current_tree(workspace_id: int) -> Optional[Dict[str, Any]]:
+    """
+    The cached tree of the workspace if it is stamped with the workspace's current write
+    generation; an entry left behind by an older generation is dropped instead.
+    """
+    cached = workspace_tree_cache.get(workspace_id)
+    if cached is None:
+        return None
+    generation, tree = cached
+    if generation != workspace_tree_generation.get(workspace_id, 0):
+        workspace_tree_cache.pop(workspace_id, None)
+        return None
+    return tree
+
+
+async def load_workspace_tree(db: AsyncSession, workspace_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Full workspace tree with APIs and test cases, as returned by the node mutation endpoints.
+    Served from workspace_tree_cache when the cached tree is current; the result is already
+    value_corrected. Callers must have committed their changes: the tree is read on a sibling
+    session. The result is only cached when no write to the workspace landed while it was read.
+    """
+    cached = _current_tree(workspace_id)
+    if cached is not None:
+        return cached
+    generation = workspace_tree_generation.get(workspace_id, 0)
+
+    # The workspace row and the flat tree query are independent reads; overlap their round trips
+    result, (nodes, apis_dict, total_apis, total_test_cases) = await asyncio.gather(
+        db.execute(select(Workspace).where(Workspace.id == workspace_id)),
+        fetch_tree_with_apis_own_session(Node.workspace_id == workspace_id)
+    )
+    workspace = result.scalar_one_or_none()
+    if not workspace:
+        return None
+
+    # Build file tree
+    file_tree = build_file_tree(nodes, True, apis_dict)
+
+    # The tree is already response-ready; only the workspace fields go through value_correction
+    data = value_correction({
+        "id": workspace.id,
+        "name": workspace.name,
+        "description": workspace.description,
+        "created_at": workspace.created_at
+    })
+    data.update({
+        "file_tree": file_tree,
+        "total_nodes": len(nodes),
+        "include_apis": True,
+        "total_apis": total_apis,
+        "total_test_cases": total_test_cases
+    })
+    if workspace_tree_generation.get(workspace_id, 0) == generation:
+        workspace_tree_cache[workspace_id] = (generation, data)
+    return data
+
+
+def _find_children_list(file_tree: List[dict], node_id: Optional[int]) -> Optional[List[dict]]:
+    """The children list of node_id within the tree (the top level for None)"""
+    if node_id is None:
+        return file_tree
+    stack = list(file_tree)
+    while stack:
+        entry = stack.pop()
+        if entry.get("id") == node_id and "type" in entry:
+            return entry["children"]
+        stack.extend(child for child in entry.get("children", ()) if "type" in child)
+    return None
+
+
+def _count_subtree(entry: dict) -> Tuple[int, int, int]:
+    """(nodes, apis, test cases) in a tree entry and everything below it"""
+    nodes = apis = cases = 0
+    stack = [entry]
+    while stack:
+        item = stack.pop()
+        if "type" not in item:
+            cases += 1
+            continue
+        nodes += 1
+        if item["method"] is not None:
+            apis += 1
+        stack.extend(item["children"])
+    return nodes, apis, cases
+
+
+async def graft_workspace_tree(
+    db: AsyncSession,
+    workspace_id: int,
+    parent_id: Optional[int],
+    new_root_id: int
+):
+    """
+    Add a newly created subtree to the cached tree of its workspace, loading only the new
+    nodes and their APIs. Does nothing when the tree is not cached; the next
+    load_workspace_tree builds it from scratch. Like load_workspace_tree, call it after commit.
+    """
+    tree = _current_tree(workspace_id)
+    # Even with nothing cached, a load already in flight must not store its pre-commit tree
+    generation = bump_workspace_tree_generation(workspace_id)
+    if tree is None:
+        return
+
+    in_subtree = Node.id.in_(select(NodeClosure.descendant_id).where(NodeClosure.ancestor_id == new_root_id))
+    nodes, apis_dict, _, _ = await fetch_tree_with_apis(db, in_subtree)
+
+    # Anything else touching the tree during the read makes patching it unsafe; rebuild instead
+    cached = workspace_tree_cache.get(workspace_id)
+    if cached is None or cached[1] is not tree or workspace_tree_generation[workspace_id] != generation:
+        invalidate_workspace_tree(workspace_id)
+        return
+    siblings = _find_children_list(tree["file_tree"], parent_id)
+    if siblings is None:
+        invalidate_workspace_tree(workspace_id)
+        return
+    # A tree built after the commit already holds the subtree
+    if any(entry.get("id") == new_root_id and "type" in entry for entry in siblings):
+        workspace_tree_cache[workspace_id] = (generation, tree)
+        return
+
+    for entry in build_file_tree(nodes, True, apis_dict, root_parent_id=parent_id):
+        siblings.append(entry)
+        added_nodes, added_apis, added_cases = _count_subtree(entry)
+        tree["total_nodes"] += added_nodes
+        tree["total_apis"] += added_apis
+        tree["total_test_cases"] += added_cases
+    siblings[:] = order_tree_children(siblings)
+    workspace_tree_cache[workspace_id] = (generation, tree)
+
+
+def prune_workspace_tree(workspace_id: int, node_id: int):
+    """Remove a deleted node and its subtree from the cached tree of its workspace, if cached"""
+    tree = _current_tree(workspace_id)
+    generation = bump_workspace_tree_generation(workspace_id)
+    if tree is None:
+        return
+    stack = [tree["file_tree"]]
+    while stack:
+        children = stack.pop()
+        for index, entry in enumerate(children):
+            if "type" not in entry:
+                continue
+            if entry["id"] == node_id:
+                del children[index]
+                removed_nodes, removed_apis, removed_cases = _count_subtree(entry)
+                tree["total_nodes"] -= removed_nodes
+                tree["total_apis"] -= removed_apis
+                tree["total_test_cases"] -= removed_cases
+                workspace_tree_cache[workspace_id] = (generation, tree)
+                return
+            stack.append(entry["children"])
+    # Not found: the cached tree is out of step, rebuild it on the next read
+    invalidate_workspace_tree(workspace_id)
 
 
 @router.get("/{workspace_id}")
@@ -78,90 +346,74 @@ async def get_workspace_with_tree(
     db: AsyncSession = Depends(get_db)
 ):
     """Get workspace details with file tree structure, optionally including APIs and test cases for bulk testing"""
-    try:
-        # Get user
-        user = await get_user_by_username(db, username)
-        if not user:
-            return create_response(400, error_message="User not found")
-
-
-        # Set all user's workspaces inactive, then set this one active
-        await db.execute(
-            select(Workspace)
-            .where(Workspace.user_id == user.id)
-            .execution_options(synchronize_session="fetch")
-        )
-        await db.execute(
-            Workspace.__table__.update()
-            .where(Workspace.user_id == user.id)
-            .values(active=False)
-        )
-        await db.execute(
-            Workspace.__table__.update()
-            .where(Workspace.id == workspace_id)
-            .values(active=True)
-        )
-        await db.commit()
-
-        # Get workspace with nodes
-        result = await db.execute(
-            select(Workspace)
-            .options(selectinload(Workspace.nodes))
-            .where(
-                and_(
-                    Workspace.id == workspace_id,
-                    Workspace.user_id == user.id
-                )
-            )
+    # Get user
+    user = await get_user_by_username(db, username)
+    if not user:
+        return create_response(400, error_message="User not found")
+
+
+    # Set all user's workspaces inactive, then set this one active
+    await db.execute(
+        select(Workspace)
+        .where(Workspace.user_id == user.id)
+        .execution_options(synchronize_session="fetch")
+    )
+    await db.execute(
+        Workspace.__table__.update()
+        .where(Workspace.user_id == user.id)
+        .values(active=False)
+    )
+    await db.execute(
+        Workspace.__table__.update()
+        .where(Workspace.id == workspace_id)
+        .values(active=True)
+    )
+    await db.commit()
+
+    # Get workspace
+    workspace_query = select(Workspace).where(
+        and_(
+            Workspace.id == workspace_id,
+            Workspace.user_id == user.id
         )
-        workspace = result.scalar_one_or_none()
+    )
 
-        if not workspace:
+    # With APIs this is the same tree the node mutations return, so it is served from (and fills)
+    # workspace_tree_cache; entries carry the workspace's write generation, so a tree older than
+    # the last node, API or case write is never served
+    if include_apis:
+        result = await db.execute(workspace_query)
+        if not result.scalar_one_or_none():
             return create_response(206, error_message="Workspace not found or access denied")
+        return create_response(200, await load_workspace_tree(db, workspace_id))
 
-        apis_dict = {}
-        total_apis = 0
-        total_test_cases = 0
-
-        # If including APIs, fetch all APIs with test cases for this workspace
-        if include_apis:
-            apis_result = await db.execute(
-                select(Api)
-                .join(Node, Api.file_id == Node.id)
-                .options(selectinload(Api.cases))
-                .where(
-                    and_(
-                        Node.workspace_id == workspace_id,
-                        Api.is_active == True
-                    )
-                )
-            )
-            apis = apis_result.scalars().all()
-
-            # Group APIs by their file_id
-            for api in apis:
-                if api.file_id not in apis_dict:
-                    apis_dict[api.file_id] = []
-                apis_dict[api.file_id].append(api)
-                total_apis += 1
-                total_test_cases += len(api.cases) if api.cases else 0
-
-        # Build file tree
-        file_tree = build_file_tree(workspace.nodes, include_apis, apis_dict) if workspace.nodes else []
-
-        data = {
-            "id": workspace.id,
-            "name": workspace.name,
-            "description": workspace.description,
-            "created_at": workspace.created_at,
-            "file_tree": file_tree,
-            "total_nodes": len(workspace.nodes) if workspace.nodes else 0,
-            "include_apis": include_apis,
-            "total_apis": total_apis,
-            "total_test_cases": total_test_cases
-        }
+    # The workspace lookup and the node query are independent; overlap their round trips. The
+    # nodes are only used once the workspace is confirmed to belong to the user
+    result, nodes = await asyncio.gather(
+        db.execute(workspace_query),
+        fetch_tree_nodes_own_session(Node.workspace_id == workspace_id)
+    )
+    workspace = result.scalar_one_or_none()
+
+    if not workspace:
+        return create_response(206, error_message="Workspace not found or access denied")
+
+    # Build file tree
+    file_tree = build_file_tree(nodes)
 
-        return create_response(200, value_correction(data))
+    # The tree is already response-ready; only the workspace fields go through value_correction
+    data = value_correction({
+        "id": workspace.id,
+        "name": workspace.name,
+        "description": workspace.description,
+        "created_at": workspace.created_at
+    })
+    data.update({
+        "file_tree": file_tree,
+        "total_nodes": len(nodes),
+        "include_apis": False,
+        "total_apis": 0,
+        "total_test_cases": 0
+    })
 
-    except Exception as e:
-        ExceptionHandler(e)
\ No newline at end of file
+    return create_response(200, data)
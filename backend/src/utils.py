@@ -1,13 +1,14 @@
 from sqlalchemy.exc import SQLAlchemyError
 from psycopg2.errors import UndefinedTable, IntegrityError
 from decimal import Decimal
-import json, os, logging, httpx
+import asyncio, json, os, logging, httpx
+import orjson
 from dateutil.relativedelta import relativedelta
 from datetime import date, datetime, timedelta
 from pathlib import Path
 from typing import Any, Dict, Optional, Type, Union
-from fastapi import HTTPException, Response, status
-from fastapi.responses import JSONResponse
+from fastapi import HTTPException, Request, Response, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from jose import jwt
 import pandas as pd
@@ -15,7 +16,7 @@ from passlib.context import CryptContext
 from pydantic import BaseModel, TypeAdapter, ValidationError
 from sqlalchemy import select
 
-from config import JWT_ALGORITHM, JWT_SECRET_KEY, SessionLocal
+from config import JWT_ALGORITHM, JWT_SECRET_KEY, SessionLocal, lock_sibling_names
 from models import Cache, Node
 from schema import PaginationRes
 
@@ -32,6 +33,7 @@ logging.basicConfig(
 )
 
 loggers = {}
+logger = logging.getLogger(__name__)
 
 
 def setup_logger(log_filename):
@@ -65,12 +67,13 @@ def setup_logger(log_filename):
     return _logger
 
 
-def logs(msg='', type='info', file_name=''):
+def logs(msg='', *args, type='info', file_name=''):
     """
         Log messages with different log levels (debug, info, warning, error, critical).
 
         Parameters:
         - msg (str, optional): The message to be logged. Defaults to an empty string.
+        - *args: Values for %-style placeholders in msg, formatted only if the record is emitted.
         - type (str, optional): The log level/type (debug, info, warning, error, critical).
         Defaults to 'info'.
         - file_name (str, optional): The name of the log file. If provided,
@@ -80,33 +83,33 @@ def logs(msg='', type='info', file_name=''):
         None: The function logs the specified message at the specified log level.
     """
 
-    logger = logging.getLogger(__name__)
-    if file_name:
-        logger = setup_logger(file_name)
+    target = setup_logger(file_name) if file_name else logger
 
     if type == 'debug':
-        logger.debug(msg)
-    if type == 'info':
-        logger.info(msg)
-    if type == 'warning':
-        logger.warning(msg)
-    if type == 'error':
-        logger.error(msg)
-    if type == 'critical':
-        logger.critical(msg)
+        target.debug(msg, *args)
+    elif type == 'info':
+        target.info(msg, *args)
+    elif type == 'warning':
+        target.warning(msg, *args)
+    elif type == 'error':
+        target.error(msg, *args)
+    elif type == 'critical':
+        target.critical(msg, *args)
 
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
+# bcrypt is deliberately slow CPU work; run it in a worker thread so it doesn't stall the event loop
+
 # Function to verify password
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password, hashed_password):
+    return await asyncio.to_thread(pwd_context.verify, plain_password, hashed_password)
 
 
 # Function to hash the password
-def get_password_hash(password):
-    return pwd_context.hash(password)
+async def get_password_hash(password):
+    return await asyncio.to_thread(pwd_context.hash, password)
 
 async def create_access_token(data: Dict[str, Any], expires_delta: relativedelta = relativedelta(minutes=30)):
     expire = datetime.now() + expires_delta
@@ -140,7 +143,7 @@ async def blacklist_token(username: str, token: str = '') -> bool:
 
         return True
     except Exception as e:
-        logs(f"Error while blacklisting token: {e}")
+        logs("Error while blacklisting token: %s", e)
         await db.rollback()
         return False
 
@@ -271,7 +274,17 @@ def handle_http_error(e, url=None, method=None, headers=None):
 
 
 def value_correction(data):
-    if isinstance(data, str):
+    # Containers and plain scalars dominate large payloads; dispatch on exact type first
+    data_type = type(data)
+    if data_type is dict:
+        return {key: value_correction(value) for key, value in data.items()}
+    elif data_type is list:
+        return [value_correction(item) for item in data]
+    elif data_type is str:
+        return data.strip()
+    elif data_type is int or data_type is bool or data is None:
+        return data
+    elif isinstance(data, str):
         return data.strip()
     elif isinstance(data, Decimal):
         return float(data)
@@ -291,6 +304,34 @@ def value_correction(data):
         return data
 
 
+def _to_jsonable(value):
+    """orjson default hook: the type conversions value_correction makes, applied while encoding"""
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    elif isinstance(value, date):
+        return value.strftime('%Y-%m-%d')
+    elif isinstance(value, Decimal):
+        return float(value)
+    elif isinstance(value, timedelta):  # pd.Timedelta subclasses timedelta
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class CorrectedJSONResponse(ORJSONResponse):
+    """
+    ORJSONResponse that formats datetimes, dates, Decimals and timedeltas like value_correction.
+    Payloads whose strings are already clean can skip the value_correction walk and leave
+    these conversions to the encoder.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            default=_to_jsonable,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME
+        )
+
+
 def _format_validation_errors(errors: list) -> list:
     """Formats validation errors into a readable structure."""
     return [
@@ -306,7 +347,7 @@ def create_response(
     pagination: Optional[Dict[str, int]] = None,
     error_message: Optional[str] = None,
     message: Optional[str] = None
-) -> Union[JSONResponse, Response]:
+) -> Union[CorrectedJSONResponse, Response]:
     """
     Constructs a well-structured JSON response that supports data validation, error handling,
     and pagination. Data is validated against a schema if provided, and errors are formatted
@@ -321,7 +362,8 @@ def create_response(
         error_message (str, optional): An error message to be included in the response.
 
     Returns:
-        JSONResponse: A structured JSON response object.
+        CorrectedJSONResponse: A structured JSON response object (encoded with orjson; datetimes,
+                               dates and Decimals are formatted like value_correction).
     """
 
     response: dict[str, Any] = {
@@ -369,7 +411,33 @@ def create_response(
 
     response['response_code'] = response_code
 
-    return JSONResponse(content=response, status_code=response_code)
+    return CorrectedJSONResponse(content=response, status_code=response_code)
+
+
+def make_etag(resource_id: int, updated_at: Optional[datetime]) -> str:
+    """Weak ETag for a row, derived from its id and last update time"""
+    version = int(updated_at.timestamp() * 1_000_000) if updated_at else 0
+    return f'W/"{resource_id}-{version}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True when the client's If-None-Match already holds this ETag"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    return if_none_match.strip() == "*" or etag in (tag.strip() for tag in if_none_match.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    """Empty 304 response for a matching conditional GET"""
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
+
+def with_etag(response: Response, etag: str) -> Response:
+    """Attach validator headers so the client can revalidate with If-None-Match"""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
 
 
 # OTP Utility Functions
@@ -494,17 +562,31 @@ def email_otp_message(otp, email, use_for):
         server.sendmail(smtp_username, email, text)
         server.quit()
 
-        logs(f"OTP sent successfully to {email}")
+        logs("OTP sent successfully to %s", email)
         return True
 
     except Exception as e:
-        logs(f"Failed to send OTP email: {e}", type="error")
+        logs("Failed to send OTP email: %s", e, type="error")
         return False
 
 
 # Variable Resolution Functions
 import re
-from typing import Dict, Any, List, Union
+from typing import Dict, Any, List, Set, Union
+
+try:
+    # google-re2: linear-time matching, much faster than `re` on large API payloads
+    import re2 as _variable_scan_engine
+except ImportError:
+    _variable_scan_engine = re
+
+# Compiled once; matches {{variable_name}}
+VARIABLE_PATTERN = re.compile(r'\{\{([^}]+)\}\}')
+# Same pattern on the scan engine, used only for discovery (findall) over api_data strings
+VARIABLE_SCAN_PATTERN = _variable_scan_engine.compile(r'\{\{([^}]+)\}\}')
+# Stricter {{variable_name}} match (letters, numbers, underscores, hyphens) used by the
+# environment variable resolver and the runner; anything else is left as literal text
+ENV_VARIABLE_NAME_PATTERN = re.compile(r'\{\{([a-zA-Z_][a-zA-Z0-9_\-]*)\}\}')
 
 
 def extract_variables_from_text(text: str) -> List[str]:
@@ -520,8 +602,7 @@ def extract_variables_from_text(text: str) -> List[str]:
     if not isinstance(text, str):
         return []
 
-    pattern = r'\{\{([^}]+)\}\}'
-    matches = re.findall(pattern, text)
+    matches = VARIABLE_PATTERN.findall(text)
     return list(set(matches))  # Return unique variable names
 
 
@@ -536,15 +617,14 @@ def replace_variables_in_text(text: str, variables: Dict[str, str]) -> str:
     Returns:
         str: Text with variables replaced by their values
     """
-    if not isinstance(text, str) or not variables:
+    if not isinstance(text, str) or not variables or '{{' not in text:
         return text
 
     def replace_match(match):
         variable_name = match.group(1).strip()
         return str(variables.get(variable_name, match.group(0)))  # Return original if not found
 
-    pattern = r'\{\{([^}]+)\}\}'
-    return re.sub(pattern, replace_match, text)
+    return VARIABLE_PATTERN.sub(replace_match, text)
 
 
 def replace_variables_in_dict(data: Dict[str, Any], variables: Dict[str, str]) -> Dict[str, Any]:
@@ -660,26 +740,33 @@ async def get_environment_variables(environment_id: int) -> Dict[str, str]:
 
             return {}
     except Exception as e:
-        logs(f"Error getting environment variables: {e}", type="error")
+        logs("Error getting environment variables: %s", e, type="error")
         return {}
 
 
-async def resolve_api_variables(environment_id: int, api_data: Dict[str, Any]) -> Dict[str, Any]:
+async def resolve_api_variables(
+    environment_id: int,
+    api_data: Dict[str, Any],
+    variables: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
     """
     Resolve all variables in API data using variables from the specified environment.
 
     Args:
         environment_id (int): The ID of the environment containing variables
         api_data (Dict[str, Any]): The API data structure to resolve variables in
+        variables (Dict[str, str], optional): The environment's variables if the caller
+        already loaded them; skips the database lookup
 
     Returns:
         Dict[str, Any]: API data with all variables resolved
     """
-    variables = await get_environment_variables(environment_id)
+    if variables is None:
+        variables = await get_environment_variables(environment_id)
     return replace_variables_in_api_data(api_data, variables)
 
 
-def get_variables_from_api_data(api_data: Dict[str, Any]) -> List[str]:
+def get_variables_from_api_data(api_data: Dict[str, Any]) -> Set[str]:
     """
     Extract all variable names used in an API data structure.
 
@@ -687,46 +774,60 @@ def get_variables_from_api_data(api_data: Dict[str, Any]) -> List[str]:
         api_data (Dict[str, Any]): The API data structure to analyze
 
     Returns:
-        List[str]: List of unique variable names found
+        Set[str]: Unique variable names found
     """
     variables = set()
-
-    def extract_from_value(value):
-        if isinstance(value, str):
-            variables.update(extract_variables_from_text(value))
-        elif isinstance(value, dict):
-            for v in value.values():
-                extract_from_value(v)
-        elif isinstance(value, list):
-            for item in value:
-                extract_from_value(item)
-
-    extract_from_value(api_data)
-    return list(variables)
-
-
-async def get_unique_name(base_name: str, target_workspace_id: int, target_folder_id: int | None, db: AsyncSession) -> str:
+    # Iterative walk; only string leaves that can contain a token reach the regex engine
+    stack = [api_data]
+    while stack:
+        value = stack.pop()
+        value_type = type(value)
+        if value_type is dict:
+            stack.extend(value.values())
+        elif value_type is list or value_type is tuple:
+            stack.extend(value)
+        elif value_type is str and '{{' in value:
+            variables.update(VARIABLE_SCAN_PATTERN.findall(value))
+    return variables
+
+
+async def get_unique_name(
+    base_name: str,
+    target_workspace_id: int,
+    target_folder_id: int | None,
+    db: AsyncSession,
+    exclude_node_id: Optional[int] = None
+) -> str:
     """
     Generate a unique name for the copied/moved node in the target location.
     If 'name' exists, try 'name copy', 'name copy 2', etc.
+    Takes the sibling-name lock for the target folder first, so the name stays free until
+    the caller's transaction (which inserts the node) commits.
+    exclude_node_id leaves a node being moved out of the taken names, so it keeps its own name
+    when it stays in the same folder.
     """
-    async def name_exists(name):
-        query = select(Node).where(
-            Node.workspace_id == target_workspace_id,
-            Node.name == name
-        )
-        if target_folder_id is None:
-            query = query.where(Node.parent_id.is_(None))
-        else:
-            query = query.where(Node.parent_id == target_folder_id)
-        result = await db.execute(query)
-        return result.scalar_one_or_none() is not None
+    await lock_sibling_names(db, target_workspace_id, target_folder_id)
 
-    name = base_name
     _re_copy = re.compile(r"^(.*?)( copy(?: (\d+))?)?$", re.IGNORECASE)
+
+    # Every candidate starts with the base part of the name; load those siblings once
+    prefix = _re_copy.match(base_name).group(1)
+    siblings = select(Node.name).where(
+        Node.workspace_id == target_workspace_id,
+        Node.name.startswith(prefix, autoescape=True)
+    )
+    if target_folder_id is None:
+        siblings = siblings.where(Node.parent_id.is_(None))
+    else:
+        siblings = siblings.where(Node.parent_id == target_folder_id)
+    if exclude_node_id is not None:
+        siblings = siblings.where(Node.id != exclude_node_id)
+    taken = set((await db.execute(siblings)).scalars().all())
+
+    name = base_name
     n = 1
     while True:
-        if not await name_exists(name):
+        if name not in taken:
             return name
         m = _re_copy.match(name)
         if m: